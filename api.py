@@ -7,7 +7,6 @@ from fastapi.middleware.cors import CORSMiddleware
 import json
 import logging
 from fastapi.responses import JSONResponse
-from connect4_alg import Position, Solver
 import numpy as np
 
 from camera_grid import Grid
@@ -22,11 +21,19 @@ import asyncio
 
 import os
 import random
+import threading
 
-from plays import board2key  # Import the actual board2key function
+from plays import board_outcome, calculate_board_outcomes, LookupTableService, ponderer, result_cache, solver_pool
+from plays.plays import calculate_board_scores
+
+# Same logging as main.py and proper_api.py, INFO records include the solver search stats of plays
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 print(f"[API] PID: {os.getpid()}")
 
+# Loaded once in the background at server start, then shared read-only by every game (see GET /lookup_table)
+lookup_service = LookupTableService('lookup_table_till_move_12').start()
+
 app = FastAPI()
 
 # Allow CORS for all origins (for development)
@@ -47,7 +54,10 @@ last_board_state = None
 selected_difficulty = 'impossible'
 selected_debug = False
 selected_training_mode = False
+selected_weak_feedback = False
 lookup_table = dict()
+solver_session = None  # SolverSession following the current game
+solver_session_lock = threading.RLock()  # held by every use of solver_session (requests run in a threadpool)
 debug_mode = True  # New debug mode flag
 
 # Motor controller and camera globals
@@ -109,6 +119,7 @@ class StartGameRequest(BaseModel):
     difficulty: str  # 'easy', 'medium', 'hard', 'impossible'
     who_starts: str  # 'player' or 'bot'
     training_mode: bool = False
+    weak_feedback: bool = False  # Grade moves by outcome (win/draw/loss) only, with a cheaper weak solve
     no_motors: bool = False
     no_camera: bool = False
     nickname: Optional[str] = None
@@ -559,7 +570,7 @@ def get_move_message(quality):
 
 @app.post("/start", response_model=BoardResponse)
 def start_game_with_options(req: StartGameRequest):
-    global game_board, winner, turn, selected_difficulty, reset_required, selected_debug, lookup_table, selected_training_mode, last_start_req, debug_mode, current_nickname
+    global game_board, winner, turn, selected_difficulty, reset_required, selected_debug, lookup_table, selected_training_mode, selected_weak_feedback, last_start_req, debug_mode, current_nickname, solver_session
 
     # Store the request for potential auto-restart
     last_start_req = req
@@ -593,19 +604,22 @@ def start_game_with_options(req: StartGameRequest):
     else:
         print("[DEBUG MODE] Skipping hardware initialization and camera processing")
 
+    ponderer.stop()
     game_board = Board()
     winner = None
     selected_difficulty = req.difficulty
     selected_debug = False # This is now controlled by the global debug_mode flag
     selected_training_mode = req.training_mode
+    selected_weak_feedback = req.weak_feedback
     turn = 0 if req.who_starts == 'player' else 1
     reset_required = False
 
-    try:
-        with open('lookup_table_till_move_12.json', 'r') as file:
-            lookup_table = json.load(file)
-    except Exception:
-        lookup_table = dict()
+    # Never blocks: games started before the table is ready compute every position
+    lookup_table = lookup_service.table()
+
+    # Solver following this game, built (with the opening book) before the first move
+    with solver_session_lock:
+        solver_session = solver_pool.new_session()
 
     current_nickname = getattr(req, 'nickname', '')
 
@@ -623,59 +637,73 @@ def _process_player_move(player_col: int):
     Processes a player's move, handles bot's turn, and returns the game state.
     This is the unified logic for both debug and normal gameplay.
     """
-    global game_board, winner, turn, selected_difficulty, lookup_table, selected_training_mode, current_nickname
-
-    # Calculate scores for move evaluation (both training and normal mode)
-    scores = None
-    move_message = None
-
-    # Check if board is empty (no moves played yet)
-    board_empty = np.sum(game_board.board_array != 0) == 0
-
-    # Only calculate scores and generate messages if board is not empty
-    if not board_empty:
-        # Use unified function for score calculation
-        scores = get_board_scores(game_board.board_array, lookup_table)
-
-        # Generate move message for non-training mode AND training mode (show funny messages in both)
-        if scores:
-            quality = evaluate_move_quality(game_board, player_col, scores)
-            move_message = get_move_message(quality)
-
-    # Execute player move
-    game_over = game_board.play_turn(player_col, param.PLAYER_PIECE)
-    final_score = None
-
-    if game_over:
-        winner = param.PLAYER_PIECE
-        final_score = compute_score(game_board.board_array, winner)
-        # Auto-save score with difficulty
-        if current_nickname.strip():
-            save_score_to_leaderboard(current_nickname.strip(), final_score, selected_difficulty)
-    else:
-        turn ^= 1
-        # Execute bot move
-        if not game_over:
-            col = get_bot_move(game_board, selected_difficulty)
-            play_bot_turn_on_board(col)  # Will log in debug mode or execute physical move
-            game_over = game_board.play_turn(col, param.BOT_PIECE)
-            if game_over:
-                winner = param.BOT_PIECE
-                final_score = compute_score(game_board.board_array, winner)
-                # Auto-save score with difficulty
-                if current_nickname.strip():
-                    save_score_to_leaderboard(current_nickname.strip(), final_score, selected_difficulty)
+    global game_board, winner, turn, selected_difficulty, lookup_table, selected_training_mode, selected_weak_feedback, current_nickname, solver_session
+
+    # The whole move runs under the session lock: the session (a Solver) must not be searched by two requests at once
+    with solver_session_lock:
+        # The move arrived: hand the pondering solver back before using the solvers
+        ponderer.stop()
+
+        # Calculate scores for move evaluation (both training and normal mode)
+        scores = None
+        move_message = None
+
+        # Check if board is empty (no moves played yet)
+        board_empty = np.sum(game_board.board_array != 0) == 0
+
+        # Only calculate scores and generate messages if board is not empty
+        if not board_empty:
+            # Use unified function for score calculation
+            # Training mode displays the exact scores, otherwise the outcome of each move may be enough
+            if selected_weak_feedback and not selected_training_mode:
+                scores = get_board_outcomes(game_board.board_array, lookup_table)
+            else:
+                scores = get_board_scores(game_board.board_array, lookup_table)
+
+            # Generate move message for non-training mode AND training mode (show funny messages in both)
+            if scores:
+                quality = evaluate_move_quality(game_board, player_col, scores)
+                move_message = get_move_message(quality)
+
+        # Execute player move
+        game_over = game_board.play_turn(player_col, param.PLAYER_PIECE)
+        solver_session.play(player_col)
+        final_score = None
+
+        if game_over:
+            winner = param.PLAYER_PIECE
+            final_score = compute_score(game_board.board_array, winner)
+            # Auto-save score with difficulty
+            if current_nickname.strip():
+                save_score_to_leaderboard(current_nickname.strip(), final_score, selected_difficulty)
+        else:
             turn ^= 1
-
-    return BoardResponse(
-        board=game_board.board_array.tolist(),
-        winner=winner,
-        turn=turn,
-        valid_moves=game_board.get_valid_locations(),
-        scores=scores if selected_training_mode else None,  # Show scores in training mode
-        final_score=final_score,
-        move_message=move_message
-    )
+            # Execute bot move
+            if not game_over:
+                col = get_bot_move(game_board, selected_difficulty)
+                play_bot_turn_on_board(col)  # Will log in debug mode or execute physical move
+                game_over = game_board.play_turn(col, param.BOT_PIECE)
+                solver_session.play(col)
+                if game_over:
+                    winner = param.BOT_PIECE
+                    final_score = compute_score(game_board.board_array, winner)
+                    # Auto-save score with difficulty
+                    if current_nickname.strip():
+                        save_score_to_leaderboard(current_nickname.strip(), final_score, selected_difficulty)
+                elif selected_difficulty == 'impossible':
+                    # Analyze the replies of the player while they think
+                    ponderer.start(game_board.board_array, lookup_table)
+                turn ^= 1
+
+        return BoardResponse(
+            board=game_board.board_array.tolist(),
+            winner=winner,
+            turn=turn,
+            valid_moves=game_board.get_valid_locations(),
+            scores=scores if selected_training_mode else None,  # Show scores in training mode
+            final_score=final_score,
+            move_message=move_message
+        )
 
 @app.post("/move", response_model=BoardResponse)
 def make_move(move: MoveRequest):
@@ -692,33 +720,30 @@ def make_move(move: MoveRequest):
 def get_board_scores(board_array, lookup_table):
     """
     Unified function to get scores for a board position.
-    First checks lookup table, then falls back to computation if needed.
+    First checks lookup table and the solver result cache, then falls back to computation if needed.
+    The computation gets the bot's think time (MAX_THINK_TIME), None is returned when it runs out.
     """
     try:
-        # Use the exact same key generation as optimal_play function
-        key = board2key(board_array)
-        flipped_key = board2key(board_array[:, ::-1])
-
-        # First try direct lookup
-        if key in lookup_table:
-            return lookup_table[key]
-
-        # Try flipped board lookup
-        elif flipped_key in lookup_table:
-            return lookup_table[flipped_key][::-1]
-
-        # If not in lookup table, compute using impossible mode algorithm
-        else:
-            print(f"Board position not found in lookup table, computing with impossible algorithm...")
-            position = Position(board_array)
-            solver = Solver()
-            scores = solver.analyze(position, False)
-            return scores
+        # Same lookup and cache as the bot (optimal_play), with the solver of the current game
+        with solver_session_lock:
+            return calculate_board_scores(board_array, lookup_table, solver_session, solver_pool.max_think_time)
 
     except Exception as e:
         print(f"Error in get_board_scores: {e}")
         return None
 
+def get_board_outcomes(board_array, lookup_table):
+    """
+    Outcome (1: win, 0: draw, -1: loss) of each move for a board position.
+    Same as get_board_scores, but positions outside of the lookup table get a cheaper weak solve.
+    """
+    try:
+        with solver_session_lock:
+            return calculate_board_outcomes(board_array, lookup_table, solver_session, solver_pool.max_think_time)
+    except Exception as e:
+        print(f"Error in get_board_outcomes: {e}")
+        return None
+
 def make_debug_move(move: MoveRequest):
     """Handle UI-based moves in debug mode"""
     global game_board, winner, turn
@@ -760,6 +785,12 @@ def wait_for_player_move_endpoint():
         if not magazine2_full:
             magazines_status.append("Magazine 2 is empty")
         error_message = f"Cannot make move: {', '.join(magazines_status)}. Please fill the magazines before continuing."
+        if winner is None and turn == 0 and np.any(game_board.board_array != 0):
+            # The game may end here: tell who would win it with perfect play, if it is known within the think time
+            ponderer.stop()
+            outcome = board_outcome(game_board.board_array, param.PLAYER_PIECE, lookup_table)
+            if outcome is not None:
+                error_message += " With perfect play from here: " + {1: "you win.", 0: "draw.", -1: "the bot wins."}[outcome]
         raise HTTPException(status_code=400, detail=error_message)
 
     if winner is not None:
@@ -779,6 +810,16 @@ def wait_for_player_move_endpoint():
 
     return _process_player_move(detected_col)
 
+@app.get("/lookup_table")
+def get_lookup_table_status():
+    """Readiness of the lookup table loaded at server start"""
+    return lookup_service.status()
+
+@app.get("/result_cache")
+def get_result_cache_stats():
+    """Size and hit/miss/eviction counters of the solver result cache"""
+    return result_cache.stats()
+
 @app.get("/state", response_model=BoardResponse)
 def get_state():
     global game_board, winner, turn
@@ -883,6 +924,7 @@ def get_bot_move(board, difficulty):
     elif difficulty == 'hard':
         return hard_play(board)
     elif difficulty == 'impossible':
-        return optimal_play(board, lookup_table)
+        with solver_session_lock:
+            return optimal_play(board, lookup_table, solver_session)
     else:
         return easy_play(board)
@@ -0,0 +1,22 @@
+"""
+Convert a JSON lookup table (board key -> scores) into the binary format opened by plays.LookupTable.
+
+usage: python "bot trainning/convert_lookup_table.py" lookup_table_till_move_12.json [lookup_table_till_move_12.bin]
+"""
+import os
+import sys
+from time import time
+
+from plays._lookup_table import json2table
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Hint: usage is convert_lookup_table.py <json_file> [<table_file>]")
+        exit()
+
+    json_file = sys.argv[1]
+    table_file = sys.argv[2] if len(sys.argv) == 3 else os.path.splitext(json_file)[0] + ".bin"
+
+    start_time = time()
+    n_entries = json2table(json_file, table_file)
+    print(f"Wrote {n_entries} entries to {table_file} in {time() - start_time:.2f} seconds")
@@ -0,0 +1,22 @@
+"""
+Merge the positions solved during games (see POSITION_LOG in config/solver.yaml) into a binary lookup table.
+Positions already in the table keep their scores. Running servers keep the table they opened until restarted.
+
+usage: python "bot trainning/merge_position_log.py" lookup_table_till_move_12.bin [solved_positions.records]
+"""
+import sys
+from time import time
+
+from plays._position_log import PositionLog, position_log_file
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Hint: usage is merge_position_log.py <table_file> [<log_file>]")
+        exit()
+
+    table_file = sys.argv[1]
+    log_file = sys.argv[2] if len(sys.argv) == 3 else position_log_file()
+
+    start_time = time()
+    n_entries = PositionLog(log_file).merge_into(table_file)
+    print(f"Merged {log_file} into {table_file} ({n_entries} entries before deduplication) in {time() - start_time:.2f} seconds")
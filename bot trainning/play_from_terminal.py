@@ -1,19 +1,15 @@
-import os
-import json
 from plays import *
 from game_board import Board
 import modules.board_param as param
 
 if __name__ == "__main__":
-    lookup_table_loc = 'lookup_table.json'
+    lookup_table_loc = 'lookup_table' # .bin (see LookupTable) or .json
 
-    if os.path.isfile(lookup_table_loc):
-        with open(lookup_table_loc, 'r') as file:
-            lookup_table = json.load(file)
-            print(f"Loaded lookup table {lookup_table_loc}.")
+    lookup_table = load_lookup_table(lookup_table_loc)
+    if len(lookup_table) > 0:
+        print(f"Loaded lookup table {lookup_table_loc}.")
     else:
-        print(f"The file '{lookup_table_loc}' does not exist.")
-        lookup_table = dict()
+        print(f"The file '{lookup_table_loc}.bin' (or .json) does not exist.")
 
 
     board = Board()
@@ -3,13 +3,21 @@ import itertools
 from time import time
 import multiprocessing as mp
 import sys # For command line args
+import os
+import json
+import numpy as np
 from connect4_alg import Position, Solver
+from plays import LookupTable, SolverPool
+from plays._keys import MAX_KEY3_MOVES
+from plays._lookup_table import RECORD_DTYPE, oriented_entries, read_records, write_records
+from plays._solver_pool import load_solver_config
 import modules.board_param as param
 
 SENTINEL = None
-
-def board2key(board):
-    return "".join(map(str, board.flatten()))
+SOLVER_CONFIG_FILE = "config/solver_generate.yaml"
+BATCH_SIZE = 256 # number of boards sent to a solver at once
+SHARD_SIZE = 65536 # max number of positions of a shard (changing it invalidates existing shards)
+MANIFEST_NAME = "manifest.json"
 
 def ret_game_states():
     for start_piece in (param.BOT_PIECE, param.PLAYER_PIECE):
@@ -40,100 +48,134 @@ def ret_game_states():
                         continue
 
 
-def combinations_with_max_repeats(iterable, r, max_repeats):
+def get_game_levels(max_n_turns= param.ROW_COUNT * param.COLUMN_COUNT):
     """
-    Optimized version that pre-calculates which combinations are possible.
-
-    Parameters
-    ----------
+    Generator of (n_turns, level) for every number of moves n_turns < max_n_turns, where level is a
+    dictionary of key3 -> bitboards (see Position.bitboards) of every reachable position with n_turns moves.
 
-    iterable:
-        list of options
-    r:
-        combination of length r is returned
-    max_repeats:
-        maximum number of times an option can be repeated
+    Like `explore` in generator.cpp, positions are deduplicated by their symmetric Position.key3,
+    so each position is generated once for itself and its mirror. Winning moves are never played,
+    so no generated position is already won. Only the positions of one depth are kept in memory.
     """
-    items = list(set(iterable))  # Remove duplicates
-    n = len(items)
-    
-    def generate_combinations(pos, current, remaining, counts):
-        if remaining == 0:
-            yield tuple(current)
-            return
-        
-        if pos >= n:
-            return
-        
-        item = items[pos]
-        
-        # Try adding 0 to min(max_repeats, remaining) copies of current item
-        for copies in range(min(max_repeats + 1, remaining + 1)):
-            new_current = current + [item] * copies
-            new_remaining = remaining - copies
-            
-            yield from generate_combinations(pos + 1, new_current, new_remaining, counts)
-    
-    yield from generate_combinations(0, [], r, {})
-
-def get_game_states(min_n_turns=0, max_n_turns= param.ROW_COUNT * param.COLUMN_COUNT):
-    """Generator of valid board game states"""
-
-    cols = [i for i in range(param.COLUMN_COUNT)]
-    for n_turns in range(min_n_turns, max_n_turns):
-    # for n_turns in range(2):
-        print("\x1b[1;31m" + str(n_turns) + "\033[0m")
-        for combo in combinations_with_max_repeats(cols, n_turns, param.ROW_COUNT):
-            n_bot_moves = n_turns // 2
-            all_combinations = itertools.combinations(range(len(combo)), n_bot_moves)
-            for bot_indices in all_combinations:
-                board = Board()
-                for turn, col in enumerate(combo):
-                    piece = param.BOT_PIECE if (turn in bot_indices) else param.PLAYER_PIECE
-                    board.play_turn(col, piece, display_board=False)
-                yield board
-        
+    position = Position()
+    level = {position.key3(): position.bitboards()}
+    for n_turns in range(max_n_turns):
+        yield n_turns, level
 
-def get_optimal_move(board):
-    position = Position(board)
-    solver = Solver()
-    scores = solver.analyze(position, False)
+        if n_turns + 1 == max_n_turns:
+            break
+        next_level = {}
+        for bitboards in level.values():
+            position = Position.from_bitboards(*bitboards)
+            for col in range(param.COLUMN_COUNT):
+                if position.can_play(col) and not position.is_winning_move(col):
+                    child = Position.from_bitboards(*bitboards)
+                    child.play_col(col)
+                    next_level.setdefault(child.key3(), child.bitboards())
+        level = next_level
+
+def get_shards(min_n_turns=0, max_n_turns= param.ROW_COUNT * param.COLUMN_COUNT):
+    """
+    Generator of (shard_name, bitboards) splitting the positions with min_n_turns <= moves < max_n_turns
+    into shards of at most SHARD_SIZE positions. A shard covers a range of sorted key3 of one depth,
+    so the shards (and the order of their positions) are the same from one run to the next.
+    Positions with more than MAX_KEY3_MOVES moves are not generated: their key3 is not reliable.
+    """
+    for n_turns, level in get_game_levels(min(max_n_turns, MAX_KEY3_MOVES + 1)):
+        if n_turns < min_n_turns:
+            continue
+        print("\x1b[1;31m" + str(n_turns) + "\033[0m" + f" ({len(level)} positions)")
+        keys = sorted(level)
+        for index, start in enumerate(range(0, len(keys), SHARD_SIZE)):
+            yield f"d{n_turns:02d}_{index:05d}", [level[key] for key in keys[start:start + SHARD_SIZE]]
+
+# Large-table solver of each worker process, created lazily by the pool
+solver_pool = SolverPool.from_config(SOLVER_CONFIG_FILE)
+WEAK = load_solver_config(SOLVER_CONFIG_FILE).WEAK
+
+def get_optimal_moves(boards):
+    """Scores (or outcomes if WEAK) of every column for a Nx6x7 stack of board arrays"""
+    with solver_pool.acquire() as solver:
+        scores = solver.analyze_many(boards, WEAK)
+    if WEAK:
+        # weak scores only carry their sign
+        scores = np.where(scores == Solver.INVALID_MOVE, scores, np.sign(scores))
     return scores
 
+# Shards and manifest
+
+def load_manifest(shard_dir):
+    """
+    :return: Manifest of the shards of `shard_dir` (a new one if there is none yet)
+    """
+    manifest_file = os.path.join(shard_dir, MANIFEST_NAME)
+    if not os.path.isfile(manifest_file):
+        return {"weak": WEAK, "shard_size": SHARD_SIZE, "shards": {}}
+
+    with open(manifest_file, 'r') as f:
+        manifest = json.load(f)
+    if manifest["weak"] != WEAK or manifest["shard_size"] != SHARD_SIZE:
+        raise ValueError(f"{shard_dir} was generated with other settings (WEAK, SHARD_SIZE), use another output")
+    return manifest
+
+def save_manifest(shard_dir, manifest):
+    """Replace the manifest atomically, so that an interruption never leaves a partial file"""
+    manifest_file = os.path.join(shard_dir, MANIFEST_NAME)
+    with open(manifest_file + ".tmp", 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_file + ".tmp", manifest_file)
+
+def shard_file(shard_dir, shard_name):
+    return os.path.join(shard_dir, shard_name + ".records")
+
 # Multiprocessing functions
 
-def produce_states(state_queue, num_workers, min_n_turns, max_n_turns):
+def produce_shards(shard_queue, num_workers, min_n_turns, max_n_turns, done_shards):
     print(f"Producer: {mp.current_process().name}")
-    for game_state in get_game_states(min_n_turns, max_n_turns):
-        state_queue.put(game_state)
+    for shard_name, bitboards in get_shards(min_n_turns, max_n_turns):
+        if shard_name not in done_shards:
+            shard_queue.put((shard_name, bitboards))
     # Send stop signal to solvers
     for _ in range(num_workers):
-        state_queue.put(SENTINEL) # Sentinel for solvers
+        shard_queue.put(SENTINEL) # Sentinel for solvers
 
-def solver(state_queue, result_queue):
+def solver(shard_queue, result_queue, shard_dir):
     while True:
-        game_state = state_queue.get()
-        if game_state is SENTINEL:
+        item = shard_queue.get()
+        if item is SENTINEL:
             break
-        optimal_move = get_optimal_move(game_state)
-        # optimal_move = 3
-        print(f"{mp.current_process().name} -> {optimal_move}")
-        result_queue.put((board2key(game_state), optimal_move))
+        shard_name, bitboards = item
+        records_file = shard_file(shard_dir, shard_name)
+
+        # Resume after the records already written by an interrupted run
+        n_done = len(read_records(records_file)) if os.path.isfile(records_file) else 0
+        with open(records_file, 'ab') as f:
+            f.truncate(n_done * RECORD_DTYPE.itemsize) # drop a record cut by the interruption
+            for start in range(n_done, len(bitboards), BATCH_SIZE):
+                boards = np.stack([Position.from_bitboards(*b).get_board()[::-1] for b in bitboards[start:start + BATCH_SIZE]]).astype(np.int8)
+                write_records(f, *oriented_entries(boards, get_optimal_moves(boards)))
+        print(f"{mp.current_process().name} -> {shard_name}: {len(bitboards)} boards ({n_done} already done)")
+        result_queue.put((shard_name, len(bitboards)))
     result_queue.put(SENTINEL)  # Sentinel for collector
 
-def collector(result_queue, num_workers, output_file):
-    results = {}
+def collector(result_queue, num_workers, shard_dir, manifest):
     done_signals = 0
     while done_signals < num_workers:
         item = result_queue.get()
-        # print(f"collector ({mp.current_process().name}): {item}")
         if item is SENTINEL:
             done_signals += 1
         else:
-            game_state, move = item
-            results[game_state] = move
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
+            shard_name, count = item
+            manifest["shards"][shard_name] = {"count": count, "file": os.path.basename(shard_file(shard_dir, shard_name))}
+            save_manifest(shard_dir, manifest)
+
+def merge_shards(shard_dir, output_file):
+    """Write the lookup table of all completed shards of `shard_dir`"""
+    manifest = load_manifest(shard_dir)
+    record_files = [os.path.join(shard_dir, shard["file"]) for shard in manifest["shards"].values()]
+    # Symmetric positions share their key3, LookupTable.write only keeps one of them
+    count = LookupTable.merge(output_file, record_files)
+    print(f"Merged {len(record_files)} shards ({count} positions) into {output_file}")
 
 
 if (__name__ == "__main__"):
@@ -151,10 +193,16 @@ if (__name__ == "__main__"):
 
     mp.freeze_support()
 
-    lookup_table_loc = "big_lookup_table.json"
-    
-    # manager = mp.Manager()
-    task_queue = mp.Queue()
+    lookup_table_loc = "big_lookup_table_weak.bin" if WEAK else "big_lookup_table.bin"
+    # One append-only file per shard and a manifest of the completed ones: an interrupted run
+    # resumes where it stopped when it is started again (with any depth range)
+    shard_dir = os.path.splitext(lookup_table_loc)[0] + "_shards"
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest = load_manifest(shard_dir)
+    print(f"{len(manifest['shards'])} shards already done in {shard_dir}")
+
+    # Bounded so that the producer does not enumerate far ahead of the solvers
+    task_queue = mp.Queue(maxsize=2 * mp.cpu_count())
     result_queue = mp.Queue()
 
     num_workers = mp.cpu_count()
@@ -164,16 +212,16 @@ if (__name__ == "__main__"):
 
     start_time = time()
 
-    producer_process = mp.Process(target=produce_states, args=(task_queue, num_workers, min_n_turns, max_n_turns))
+    producer_process = mp.Process(target=produce_shards, args=(task_queue, num_workers, min_n_turns, max_n_turns, set(manifest["shards"])))
     producer_process.start()
 
     workers = []
     for _ in range(num_workers):
-        p = mp.Process(target=solver, args=(task_queue, result_queue))
+        p = mp.Process(target=solver, args=(task_queue, result_queue, shard_dir))
         p.start()
         workers.append(p)
 
-    collector_process = mp.Process(target=collector, args=(result_queue, num_workers, lookup_table_loc))
+    collector_process = mp.Process(target=collector, args=(result_queue, num_workers, shard_dir, manifest))
     collector_process.start()
 
     producer_process.join()
@@ -181,6 +229,8 @@ if (__name__ == "__main__"):
         p.join()
     collector_process.join()
 
+    merge_shards(shard_dir, lookup_table_loc)
+
     end_time = time()
     elapsed = end_time - start_time
     minutes, seconds = divmod(elapsed, 60)
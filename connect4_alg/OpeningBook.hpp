@@ -85,14 +85,15 @@ class OpeningBook {
     * - size key elements
     * - size value elements
     */
-  void load(std::string filename) {
+  bool load(std::string filename) {
     depth = -1;
     delete T;
+    T = 0;
     std::ifstream ifs(filename, std::ios::binary); // open file
 
     if(ifs.fail()) {
       std::cerr << "Unable to load opening book: " << filename << std::endl;
-      return;
+      return false;
     } else std::cerr << "Loading opening book from file: " << filename << ". ";
 
     char _width, _height, _depth, value_bytes, partial_key_bytes, log_size;
@@ -100,37 +101,37 @@ class OpeningBook {
     ifs.read(&_width, 1);
     if(ifs.fail() || _width != width) {
       std::cerr << "Unable to load opening book: invalid width (found: " << int(_width) << ", expected: " << width << ")" << std::endl;
-      return;
+      return false;
     }
 
     ifs.read(&_height, 1);
     if(ifs.fail() || _height != height) {
       std::cerr << "Unable to load opening book: invalid height(found: " << int(_height) << ", expected: " << height << ")"  << std::endl;
-      return;
+      return false;
     }
 
     ifs.read(&_depth, 1);
     if(ifs.fail() || _depth > width * height) {
       std::cerr << "Unable to load opening book: invalid depth (found: " << int(_depth) << ")"  << std::endl;
-      return;
+      return false;
     }
 
     ifs.read(&partial_key_bytes, 1);
     if(ifs.fail() || partial_key_bytes > 8) {
       std::cerr << "Unable to load opening book: invalid internal key size(found: " << int(partial_key_bytes) << ")"  << std::endl;
-      return;
+      return false;
     }
 
     ifs.read(&value_bytes, 1);
     if(ifs.fail() || value_bytes != 1) {
       std::cerr << "Unable to load opening book: invalid value size (found: " << int(value_bytes) << ", expected: 1)"  << std::endl;
-      return;
+      return false;
     }
 
     ifs.read(&log_size, 1);
     if(ifs.fail() || log_size > 40) {
       std::cerr << "Unable to load opening book: invalid log2(size)(found: " << int(log_size) << ")"  << std::endl;
-      return;
+      return false;
     }
 
     if((T = initTranspositionTable(partial_key_bytes, log_size))) {
@@ -138,13 +139,14 @@ class OpeningBook {
       ifs.read(reinterpret_cast<char *>(T->getValues()), T->getSize() * value_bytes);
       if(ifs.fail()) {
         std::cerr << "Unable to load data from opening book" << std::endl;
-        return;
+        return false;
       }
       depth = _depth; // set it in case of success only, keep -1 in case of failure
       std::cerr << "done" << std::endl;
     }
     else std::cerr << "Unable to initialize opening book" << std::endl;
     ifs.close();
+    return depth >= 0;
   }
 
   void save(const std::string output_file) const {
@@ -168,6 +170,10 @@ class OpeningBook {
     ofs.close();
   }
 
+  int getDepth() const {
+    return depth;
+  }
+
   int get(const Position &P) const {
     if(P.nbMoves() > depth) return 0;
     else return T->get(P.key3());
@@ -178,6 +178,20 @@ class Position {
     return key_forward < key_reverse ? key_forward / 3 : key_reverse / 3; // take the smallest key and divide per 3 as the last base3 digit is always 0
   }
 
+  /**
+   * Return true if key3() is the key of the mirrored position (columns from right to left),
+   * so that data stored under key3() for the mirrored position has to be mirrored back.
+   */
+  bool key3Mirrored() const {
+    uint64_t key_forward = 0;
+    for(int i = 0; i < Position::WIDTH; i++) partialKey3(key_forward, i);
+
+    uint64_t key_reverse = 0;
+    for(int i = Position::WIDTH; i--;) partialKey3(key_reverse, i);
+
+    return key_reverse < key_forward;
+  }
+
   /**
    * Return a bitmap of all the possible next moves the do not lose in one turn.
    * A losing move is a move leaving the possibility for the opponent to win directly.
@@ -240,6 +254,27 @@ class Position {
     }
   }
 
+  /**
+   * Constructor from a bitboard pair, see the class description for the bit order
+   * @param current_position: bitmap of the current player's stones
+   * @param mask: bitmap of all the played stones
+   */
+  Position(position_t current_position, position_t mask) : current_position{current_position}, mask{mask}, moves{popcount(mask)} {}
+
+  /**
+   * @return bitmap of the current player's stones
+   */
+  position_t getCurrentPosition() const {
+    return current_position;
+  }
+
+  /**
+   * @return bitmap of all the played stones
+   */
+  position_t getMask() const {
+    return mask;
+  }
+
   /**
    * Indicates whether a column is playable.
    * @param col: 0-based index of column to play
@@ -16,8 +16,13 @@
  * along with Connect4 Game Solver. If not, see <http://www.gnu.org/licenses/>.
  */
 
+#include <algorithm>
+#include <atomic>
 #include <cassert>
 #include <iostream>
+#include <thread>
+#include <stdexcept>
+#include <string>
 #include "Solver.hpp"
 #include "MoveSorter.hpp"
 
@@ -26,6 +31,35 @@ using namespace GameSolver::Connect4;
 namespace GameSolver {
 namespace Connect4 {
 
+/**
+ * Records the SearchStats of a public search call, nested calls (solve inside analyze) are ignored.
+ */
+class Solver::StatsScope {
+  Solver &solver;
+  const bool outermost;
+  const int rootMoves;
+  const unsigned long long nodeCount, tableProbes, tableHits, bookHits;
+  const std::chrono::steady_clock::time_point start;
+
+ public:
+  StatsScope(Solver &solver, const Position &P) : solver{solver}, outermost{solver.callDepth++ == 0}, rootMoves{P.nbMoves()},
+    nodeCount{solver.nodeCount}, tableProbes{solver.tableProbes}, tableHits{solver.tableHits}, bookHits{solver.bookHits},
+    start{std::chrono::steady_clock::now()} {
+    if(outermost) {
+      solver.maxMoves = rootMoves;
+      solver.exhausted = false;
+    }
+  }
+
+  ~StatsScope() {
+    solver.callDepth--;
+    if(!outermost) return;
+    solver.lastStats = SearchStats{solver.nodeCount - nodeCount, solver.tableProbes - tableProbes, solver.tableHits - tableHits,
+                                   solver.bookHits - bookHits, solver.maxMoves - rootMoves,
+                                   std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count(), solver.exhausted};
+  }
+};
+
 /**
  * Reccursively score connect 4 position using negamax variant of alpha-beta algorithm.
  * @param: position to evaluate, this function assumes nobody already won and
@@ -42,7 +76,12 @@ int Solver::negamax(const Position &P, int alpha, int beta) {
   assert(!P.canWinNext());
 
   nodeCount++; // increment counter of explored nodes
+  if(budgeted && (stopped || budgetExceeded())) {
+    stopped = true;
+    return 0; // meaningless value, callers check stopped before using it
+  }
   // if (nodeCount % 10000000 == 0) std::cout << nodeCount << std::endl;
+  if(P.nbMoves() > maxMoves) maxMoves = P.nbMoves();
 
   Position::position_t possible = P.possibleNonLosingMoves();
   if(possible == 0)     // if no possible non losing move, opponent wins next move
@@ -64,7 +103,9 @@ int Solver::negamax(const Position &P, int alpha, int beta) {
   }
 
   const Position::position_t key = P.key();
+  tableProbes++;
   if(int val = transTable.get(key)) {
+    tableHits++;
     if(val > Position::MAX_SCORE - Position::MIN_SCORE + 1) { // we have an lower bound
       min = val + 2 * Position::MIN_SCORE - Position::MAX_SCORE - 2;
       if(alpha < min) {
@@ -80,7 +121,10 @@ int Solver::negamax(const Position &P, int alpha, int beta) {
     }
   }
 
-  if(int val = book.get(P)) return val + Position::MIN_SCORE - 1; // look for solutions stored in opening book
+  if(int val = book.get(P)) { // look for solutions stored in opening book
+    bookHits++;
+    return val + Position::MIN_SCORE - 1;
+  }
 
   MoveSorter moves;
   for(int i = Position::WIDTH; i--;)
@@ -91,6 +135,7 @@ int Solver::negamax(const Position &P, int alpha, int beta) {
     Position P2(P);
     P2.play(next);  // It's opponent turn in P2 position after current player plays x column.
     int score = -negamax(P2, -beta, -alpha); // explore opponent's score within [-beta;-alpha] windows:
+    if(stopped) return 0; // search aborted, do not store anything in the transposition table
     // no need to have good precision for score better than beta (opponent's score worse than -beta)
     // no need to check for score worse than alpha (opponent's score worse better than -alpha)
 
@@ -107,6 +152,7 @@ int Solver::negamax(const Position &P, int alpha, int beta) {
 }
 
 int Solver::solve(const Position &P, bool weak) {
+  StatsScope stats(*this, P);
   if(P.canWinNext()) // check if win in one move as the Negamax function does not support this case.
     return (Position::WIDTH * Position::HEIGHT + 1 - P.nbMoves()) / 2;
   int min = -(Position::WIDTH * Position::HEIGHT - P.nbMoves()) / 2;
@@ -128,6 +174,7 @@ int Solver::solve(const Position &P, bool weak) {
 }
 
 std::vector<int> Solver::analyze(const Position &P, bool weak) {
+  StatsScope stats(*this, P);
   std::vector<int> scores(Position::WIDTH, INVALID_MOVE);
   for (int col = 0; col < Position::WIDTH; col++)
     if (P.canPlay(col)) {
@@ -142,8 +189,236 @@ std::vector<int> Solver::analyze(const Position &P, bool weak) {
 }
 
 
+static int checkTableSize(int table_size) {
+  if(table_size < Solver::MIN_TABLE_SIZE || table_size > Solver::MAX_TABLE_SIZE)
+    throw std::invalid_argument("table_size must be between " + std::to_string(Solver::MIN_TABLE_SIZE)
+                                + " and " + std::to_string(Solver::MAX_TABLE_SIZE));
+  return table_size;
+}
+std::vector<int> Solver::analyzeParallel(const Position &P, int n_threads, bool weak) {
+  if(n_threads <= 1) return analyze(P, weak);
+
+  StatsScope stats(*this, P);
+  std::vector<int> scores(Position::WIDTH, INVALID_MOVE);
+  std::vector<int> columns; // columns that need a search, center columns first
+  for(int i = 0; i < Position::WIDTH; i++) {
+    const int col = columnOrder[i];
+    if(!P.canPlay(col)) continue;
+    if(P.isWinningMove(col)) scores[col] = (Position::WIDTH * Position::HEIGHT + 1 - P.nbMoves()) / 2;
+    else columns.push_back(col);
+  }
+  n_threads = std::min<int>(n_threads, columns.size());
+  if(n_threads <= 1) return analyze(P, weak);
+
+  std::atomic<size_t> next{0};
+  runParallel(P, n_threads, [&](Solver &solver) {
+    for(size_t i; (i = next++) < columns.size();) {
+      Position P2(P);
+      P2.playCol(columns[i]);
+      scores[columns[i]] = -solver.solve(P2, weak);
+    }
+  });
+  return scores;
+}
+
+void Solver::runParallel(const Position &P, int n_threads, const std::function<void(Solver &)> &work) {
+  while(int(helpers.size()) < n_threads - 1) {
+    helpers.emplace_back(new Solver(transTable.getLogSize()));
+    if(!bookFile.empty()) helpers.back()->loadBook(bookFile);
+  }
+
+  std::vector<SearchStats> helperStats; // counters of the helpers before the search
+  std::vector<std::thread> threads;
+  for(int t = 0; t < n_threads - 1; t++) {
+    Solver &helper = *helpers[t];
+    helperStats.push_back(SearchStats{helper.nodeCount, helper.tableProbes, helper.tableHits, helper.bookHits, 0, 0, false});
+    helper.maxMoves = P.nbMoves();
+    helper.exhausted = false;
+    threads.emplace_back(work, std::ref(helper));
+  }
+  work(*this);
+  for(int t = 0; t < n_threads - 1; t++) {
+    threads[t].join();
+    Solver &helper = *helpers[t];
+    nodeCount += helper.nodeCount - helperStats[t].nodeCount;
+    tableProbes += helper.tableProbes - helperStats[t].tableProbes;
+    tableHits += helper.tableHits - helperStats[t].tableHits;
+    bookHits += helper.bookHits - helperStats[t].bookHits;
+    maxMoves = std::max(maxMoves, helper.maxMoves);
+    exhausted = exhausted || helper.exhausted;
+  }
+}
+
+bool Solver::refineBounds(const Position &child, int &min, int &max) {
+  int med = min + (max - min) / 2; // same null window choice as solve
+  if(med <= 0 && min / 2 < med) med = min / 2;
+  else if(med >= 0 && max / 2 > med) med = max / 2;
+  int r = negamax(child, med, med + 1);
+  if(stopped) return false;
+  r = std::max(min, std::min(max, r)); // weak scores exceed the initial ±1 bounds
+  if(r <= med) max = r;
+  else min = r;
+  return true;
+}
+
+void Solver::startBudget(double time_limit, unsigned long long node_limit) {
+  budgeted = time_limit > 0 || node_limit > 0;
+  stopped = false;
+  deadline = time_limit > 0 ? std::chrono::steady_clock::now() + std::chrono::duration_cast<std::chrono::steady_clock::duration>(std::chrono::duration<double>(time_limit))
+                            : std::chrono::steady_clock::time_point::max();
+  nodeLimit = node_limit > 0 ? nodeCount + node_limit : ~0ULL;
+}
+
+void Solver::stopBudget() {
+  exhausted = stopped;
+  budgeted = false;
+  stopped = false;
+}
+
+int Solver::bestMove(const Position &P, bool weak, double time_limit, unsigned long long node_limit, int n_threads) {
+  if(n_threads > 1) return analyzeBounded(P, time_limit, node_limit, weak, n_threads).bestMove;
+
+  StatsScope stats(*this, P);
+  int best = -1;
+  for(int i = 0; i < Position::WIDTH; i++) {
+    const int col = columnOrder[i];
+    if(!P.canPlay(col)) continue;
+    if(P.isWinningMove(col)) return col;
+  }
+
+  // fallback if the budget runs out before the first column is solved: a move that does not lose at once if any
+  const Position::position_t nonLosing = P.possibleNonLosingMoves();
+  for(int i = 0; i < Position::WIDTH && best < 0; i++)
+    if(nonLosing & Position::column_mask(columnOrder[i])) best = columnOrder[i];
+  for(int i = 0; i < Position::WIDTH && best < 0; i++)
+    if(P.canPlay(columnOrder[i])) best = columnOrder[i];
+
+  startBudget(time_limit, node_limit);
+  int bestScore = INVALID_MOVE;
+  for(int i = 0; i < Position::WIDTH; i++) {
+    const int col = columnOrder[i];
+    if(!P.canPlay(col)) continue;
+    Position P2(P);
+    P2.playCol(col);
+    if(P2.canWinNext()) { // lowest possible score, only kept if every move loses at once
+      if(nonLosing == 0 && bestScore == INVALID_MOVE) {
+        bestScore = -(Position::WIDTH * Position::HEIGHT + 1 - P2.nbMoves()) / 2;
+        best = col;
+      }
+      continue;
+    }
+    // null window test: is the opponent's score after col lower than -bestScore, i.e. is col better?
+    if(bestScore != INVALID_MOVE) {
+      int r = negamax(P2, -bestScore - 1, -bestScore);
+      if(stopped) break;
+      if(r >= -bestScore) continue;
+    }
+    int score = -solve(P2, weak);
+    if(stopped) break;
+    if(weak) score = std::max(-1, std::min(1, score)); // weak scores only carry their sign
+    if(bestScore == INVALID_MOVE || score > bestScore) {
+      bestScore = score;
+      best = col;
+    }
+    if(weak && bestScore > 0) break; // a win cannot be improved in weak mode
+  }
+  stopBudget();
+  return best;
+}
+
+BoundedAnalysis Solver::analyzeBounded(const Position &P, double time_limit, unsigned long long node_limit, bool weak, int n_threads) {
+  StatsScope stats(*this, P);
+  BoundedAnalysis result{std::vector<int>(Position::WIDTH, INVALID_MOVE), std::vector<int>(Position::WIDTH, INVALID_MOVE), -1, true};
+  Position children[Position::WIDTH];
+  int childMin[Position::WIDTH], childMax[Position::WIDTH]; // bounds of the children scores (opponent's point of view)
+  bool open[Position::WIDTH] = {false};
+
+  for(int col = 0; col < Position::WIDTH; col++) {
+    if(!P.canPlay(col)) continue;
+    if(P.isWinningMove(col)) {
+      result.lower[col] = result.upper[col] = (Position::WIDTH * Position::HEIGHT + 1 - P.nbMoves()) / 2;
+      continue;
+    }
+    children[col] = P;
+    children[col].playCol(col);
+    const int nb = children[col].nbMoves();
+    if(children[col].canWinNext()) { // same early exit as solve
+      result.lower[col] = result.upper[col] = -(Position::WIDTH * Position::HEIGHT + 1 - nb) / 2;
+      continue;
+    }
+    childMin[col] = weak ? -1 : -(Position::WIDTH * Position::HEIGHT - nb) / 2;
+    childMax[col] = weak ? 1 : (Position::WIDTH * Position::HEIGHT + 1 - nb) / 2;
+    result.lower[col] = -childMax[col];
+    result.upper[col] = -childMin[col];
+    open[col] = true;
+  }
+
+  std::vector<int> columns; // open columns, center columns first
+  for(int i = 0; i < Position::WIDTH; i++)
+    if(open[columnOrder[i]]) columns.push_back(columnOrder[i]);
+  n_threads = std::min<int>(n_threads, columns.size());
+
+  if(n_threads > 1) {
+    // Every thread narrows its columns until they are exact, all threads stop at the same deadline
+    startBudget(time_limit, node_limit > 0 ? std::max(1ULL, node_limit / n_threads) : 0);
+    const auto sharedDeadline = deadline;
+    std::atomic<size_t> next{0};
+    runParallel(P, n_threads, [&](Solver &solver) {
+      if(&solver != this) {
+        solver.startBudget(time_limit, node_limit > 0 ? std::max(1ULL, node_limit / n_threads) : 0);
+        solver.deadline = sharedDeadline;
+      }
+      for(size_t i; (i = next++) < columns.size();) {
+        const int col = columns[i];
+        while(childMin[col] < childMax[col] && solver.refineBounds(children[col], childMin[col], childMax[col])) {}
+      }
+      solver.stopBudget();
+    });
+    for(int col : columns) {
+      result.lower[col] = -childMax[col];
+      result.upper[col] = -childMin[col];
+      open[col] = childMin[col] < childMax[col];
+    }
+  }
+  else startBudget(time_limit, node_limit);
+
+  while(n_threads <= 1 && !stopped) {
+    int bestLower = INVALID_MOVE;
+    for(int col = 0; col < Position::WIDTH; col++)
+      if(result.lower[col] > bestLower) bestLower = result.lower[col];
+
+    // refine first the open columns that can still be better than the best known lower bound
+    bool candidates = false;
+    for(int col = 0; col < Position::WIDTH; col++)
+      if(open[col] && result.upper[col] > bestLower) candidates = true;
+
+    bool refined = false;
+    for(int i = 0; i < Position::WIDTH && !stopped; i++) {
+      const int col = columnOrder[i];
+      if(!open[col] || (candidates && result.upper[col] <= bestLower)) continue;
+      refined = true;
+
+      if(!refineBounds(children[col], childMin[col], childMax[col])) break;
+      result.lower[col] = -childMax[col];
+      result.upper[col] = -childMin[col];
+      if(childMin[col] >= childMax[col]) open[col] = false;
+    }
+    if(!refined) break; // every column is exact
+  }
+  if(n_threads <= 1) stopBudget();
+
+  for(int col = 0; col < Position::WIDTH; col++) {
+    if(open[col]) result.complete = false;
+    if(result.lower[col] != INVALID_MOVE && (result.bestMove < 0 || result.lower[col] > result.lower[result.bestMove]
+        || (result.lower[col] == result.lower[result.bestMove] && result.upper[col] > result.upper[result.bestMove])))
+      result.bestMove = col;
+  }
+  return result;
+}
+
 // Constructor
-Solver::Solver() : nodeCount{0} {
+Solver::Solver(int table_size) : transTable{checkTableSize(table_size)}, nodeCount{0}, tableProbes{0}, tableHits{0}, bookHits{0},
+  maxMoves{0}, lastStats{}, callDepth{0}, budgeted{false}, stopped{false}, exhausted{false}, nodeLimit{0} {
   for(int i = 0; i < Position::WIDTH; i++) // initialize the column exploration order, starting with center columns
     columnOrder[i] = Position::WIDTH / 2 + (1 - 2 * (i % 2)) * (i + 1) / 2; // example for WIDTH=7: columnOrder = {3, 4, 2, 5, 1, 6, 0}
 }
@@ -19,8 +19,11 @@
 #ifndef SOLVER_HPP
 #define SOLVER_HPP
 
+#include <functional>
 #include <vector>
 #include <string>
+#include <chrono>
+#include <memory>
 #include "Position.hpp"
 #include "TranspositionTable.hpp"
 #include "OpeningBook.hpp"
@@ -28,14 +31,69 @@
 namespace GameSolver {
 namespace Connect4 {
 
+/**
+ * Result of a time or node budgeted analysis.
+ * For each column: lower <= exact score <= upper. Both are INVALID_MOVE for unplayable columns.
+ */
+struct BoundedAnalysis {
+  std::vector<int> lower;
+  std::vector<int> upper;
+  int bestMove;  // playable column with the best lower bound (then best upper bound), -1 if none
+  bool complete; // true if the score of every playable column is exact (lower == upper)
+};
+
+/**
+ * Statistics of the last top-level search call (solve, analyze, analyzeBounded...) of a Solver.
+ */
+struct SearchStats {
+  unsigned long long nodeCount;   // explored nodes
+  unsigned long long tableProbes; // transposition table lookups
+  unsigned long long tableHits;   // lookups that found an entry of the position
+  unsigned long long bookHits;    // positions scored by the opening book
+  int maxDepth;                   // deepest explored position, in moves after the searched position
+  double elapsed;                 // wall time in seconds
+  bool exhausted;                 // the search ran out of its time or node budget
+};
+
+/**
+ * A Solver is not thread-safe: search mutates its transposition table and node counter.
+ * Concurrent searches need one Solver per thread, or a lock around a shared one.
+ * Positions passed to solve/analyze are copied, so they may be reused by the caller.
+ */
 class Solver {
+ public:
+  static constexpr int MIN_TABLE_SIZE = 17; // smallest log2 size of the transposition table
+  static constexpr int MAX_TABLE_SIZE = 30; // largest log2 size of the transposition table
+  static constexpr int DEFAULT_TABLE_SIZE = 24;
+
  private:
-  static constexpr int TABLE_SIZE = 24; // store 2^TABLE_SIZE elements in the transpositiontbale
-  TranspositionTable < uint_t < Position::WIDTH*(Position::HEIGHT + 1) - TABLE_SIZE >, Position::position_t, uint8_t, TABLE_SIZE > transTable;
+  // store 2^table_size elements in the transposition table, table_size is chosen in the constructor
+  DynamicTranspositionTable < uint_t < Position::WIDTH*(Position::HEIGHT + 1) - MIN_TABLE_SIZE >, Position::position_t, uint8_t > transTable;
   OpeningBook book{Position::WIDTH, Position::HEIGHT}; // opening book
+  std::string bookFile; // file of the loaded opening book, empty if none
+  std::vector<std::unique_ptr<Solver>> helpers; // solvers of the extra threads of analyzeParallel/analyzeBounded, created on first use
   unsigned long long nodeCount; // counter of explored nodes.
+  unsigned long long tableProbes, tableHits, bookHits; // cumulated counters, see SearchStats
+  int maxMoves; // largest nbMoves of an explored position in the current top-level call
+  SearchStats lastStats;
+  int callDepth; // nesting of public search calls, statistics are recorded by the outermost one
+  class StatsScope;
   int columnOrder[Position::WIDTH]; // column exploration order
 
+  // Search budget, only checked when budgeted is true
+  bool budgeted;
+  bool stopped; // set when the budget is exhausted: all running negamax calls return meaningless values
+  bool exhausted; // the last budgeted search was stopped
+  std::chrono::steady_clock::time_point deadline;
+  unsigned long long nodeLimit; // maximum value of nodeCount
+
+  bool budgetExceeded() const {
+    return nodeCount >= nodeLimit || ((nodeCount & 1023) == 0 && std::chrono::steady_clock::now() >= deadline);
+  }
+
+  void startBudget(double time_limit, unsigned long long node_limit); // 0 for no limit
+  void stopBudget();
+
   /**
    * Reccursively score connect 4 position using negamax variant of alpha-beta algorithm.
    * @param: position to evaluate, this function assumes nobody already won and
@@ -49,6 +107,12 @@ class Solver {
    */
   int negamax(const Position &P, int alpha, int beta);
 
+  // Run work on this solver and on n_threads - 1 helpers at the same time, helper statistics are added to this solver's
+  void runParallel(const Position &P, int n_threads, const std::function<void(Solver &)> &work);
+
+  // One null window search narrowing [min, max], the bounds of the score of child. Returns false if the budget ran out
+  bool refineBounds(const Position &child, int &min, int &max);
+
  public:
   static constexpr int INVALID_MOVE = -1000;
 
@@ -59,20 +123,57 @@ class Solver {
   // Returns INVALID_MOVE for unplayable columns
   std::vector<int> analyze(const Position &P, bool weak = false);
 
+  // Same as analyze, but the columns are solved by n_threads threads.
+  // Each extra thread has its own persistent helper solver (same table size and opening book).
+  std::vector<int> analyzeParallel(const Position &P, int n_threads, bool weak = false);
+
+  // Returns a best column of a position, -1 if none is playable. Unlike analyze, only the first column gets an exact score:
+  // the other ones are first tested with a null window against the best score so far and skipped if they are not better.
+  // Stops after time_limit seconds or node_limit explored nodes (0 for no limit) and returns the best column proven so far.
+  // With n_threads > 1, the best column of analyzeBounded with n_threads is returned instead.
+  int bestMove(const Position &P, bool weak = false, double time_limit = 0, unsigned long long node_limit = 0, int n_threads = 1);
+
+  // Anytime version of analyze: stops after time_limit seconds or node_limit explored nodes (0 for no limit)
+  // and returns bounds of the score of every column. Columns that can still be the best move are refined first.
+  // With n_threads > 1, the columns are spread across threads (helper solvers of analyzeParallel) sharing the deadline,
+  // and node_limit is split evenly between them.
+  BoundedAnalysis analyzeBounded(const Position &P, double time_limit, unsigned long long node_limit = 0, bool weak = false, int n_threads = 1);
+
   unsigned long long getNodeCount() const {
     return nodeCount;
   }
 
+  // Statistics of the last solve/analyze/analyzeParallel/analyzeBounded call
+  const SearchStats &getLastStats() const {
+    return lastStats;
+  }
+
   void reset() {
     nodeCount = 0;
+    tableProbes = tableHits = bookHits = 0;
     transTable.reset();
+    for(auto &helper : helpers) helper->reset();
+  }
+
+  // Returns true if the opening book was loaded successfully
+  bool loadBook(std::string book_file) {
+    bookFile = book_file;
+    for(auto &helper : helpers) helper->loadBook(book_file);
+    return book.load(book_file);
+  }
+
+  // Returns the max depth of the loaded opening book, -1 if no book is loaded
+  int getBookDepth() const {
+    return book.getDepth();
   }
 
-  void loadBook(std::string book_file) {
-    book.load(book_file);
+  // log2 size of the transposition table
+  int getTableSize() const {
+    return transTable.getLogSize();
   }
 
-  Solver(); // Constructor
+  // Constructor, throws std::invalid_argument if table_size is out of [MIN_TABLE_SIZE, MAX_TABLE_SIZE]
+  explicit Solver(int table_size = DEFAULT_TABLE_SIZE);
 
 };
 
@@ -0,0 +1,94 @@
+#ifndef SOLVER_SESSION_HPP
+#define SOLVER_SESSION_HPP
+
+#include <stdexcept>
+#include <string>
+#include <vector>
+#include "Position.hpp"
+#include "Solver.hpp"
+
+namespace GameSolver {
+namespace Connect4 {
+
+/**
+ * A game-long solver following the position move by move.
+ *
+ * The transposition table is kept between moves, so consecutive analyses of the
+ * same game reuse most of the previously explored tree.
+ * Like Solver, a SolverSession must not be used by several threads at once.
+ */
+class SolverSession {
+ private:
+  Solver solver;
+  Position position;
+
+ public:
+  explicit SolverSession(int table_size = Solver::DEFAULT_TABLE_SIZE) : solver{table_size} {}
+
+  SolverSession(const SolverSession&) = delete;
+  SolverSession& operator=(const SolverSession&) = delete;
+
+  /**
+   * Plays a column in the followed position.
+   * @param col: 0-based index of a playable column
+   */
+  void play(int col) {
+    if(col < 0 || col >= Position::WIDTH || !position.canPlay(col))
+      throw std::invalid_argument("Column " + std::to_string(col) + " is not playable");
+    position.playCol(col);
+  }
+
+  bool canPlay(int col) const {
+    return col >= 0 && col < Position::WIDTH && position.canPlay(col);
+  }
+
+  int nbMoves() const {
+    return position.nbMoves();
+  }
+
+  const Position &getPosition() const {
+    return position;
+  }
+
+  // Scores of all possible moves of the followed position, searched by n_threads threads
+  std::vector<int> analyze(bool weak = false, int n_threads = 1) {
+    return solver.analyzeParallel(position, n_threads, weak);
+  }
+
+  // Best column of the followed position, see Solver::bestMove
+  int bestMove(bool weak = false, double time_limit = 0, unsigned long long node_limit = 0, int n_threads = 1) {
+    return solver.bestMove(position, weak, time_limit, node_limit, n_threads);
+  }
+
+  // Score of the followed position
+  int solve(bool weak = false) {
+    return solver.solve(position, weak);
+  }
+
+  // Budgeted analysis of the followed position, see Solver::analyzeBounded
+  BoundedAnalysis analyzeBounded(double time_limit, unsigned long long node_limit = 0, bool weak = false, int n_threads = 1) {
+    return solver.analyzeBounded(position, time_limit, node_limit, weak, n_threads);
+  }
+
+  // Scores of all possible moves of any position, using the session transposition table
+  std::vector<int> analyzePosition(const Position &P, bool weak = false, int n_threads = 1) {
+    return solver.analyzeParallel(P, n_threads, weak);
+  }
+
+  // Start following a new game, the transposition table is kept
+  void newGame() {
+    position = Position();
+  }
+
+  bool loadBook(std::string book_file) {
+    return solver.loadBook(book_file);
+  }
+
+  Solver &getSolver() {
+    return solver;
+  }
+};
+
+} // namespace Connect4
+} // namespace GameSolver
+#endif
@@ -150,6 +150,76 @@ class TranspositionTable : public TableGetter<key_t, value_t> {
   }
 };
 
+/**
+ * Transposition Table whose number of entries is chosen at construction time.
+ * Same storage and collision policy as TranspositionTable, but the size is the
+ * smallest prime above 2^log_size for a log_size given at runtime.
+ *
+ * partial_key_t must be able to store key_size - log_size bits for the smallest log_size used
+ * so that no error is possible thanks to Chinese theorem.
+ */
+template<class partial_key_t, class key_t, class value_t>
+class DynamicTranspositionTable {
+ private:
+  const int log_size;
+  const size_t size;
+  partial_key_t *K;     // Array to store truncated version of keys;
+  value_t *V;   // Array to store values;
+
+  size_t index(key_t key) const {
+    return key % size;
+  }
+
+ public:
+  explicit DynamicTranspositionTable(int log_size) : log_size{log_size}, size{next_prime(uint64_t(1) << log_size)} {
+    K = new partial_key_t[size];
+    V = new value_t[size];
+    reset();
+  }
+
+  ~DynamicTranspositionTable() {
+    delete[] K;
+    delete[] V;
+  }
+
+  DynamicTranspositionTable(const DynamicTranspositionTable&) = delete;
+  DynamicTranspositionTable& operator=(const DynamicTranspositionTable&) = delete;
+
+  int getLogSize() const {
+    return log_size;
+  }
+
+  /**
+   * Empty the Transition Table.
+   */
+  void reset() { // fill everything with 0, because 0 value means missing data
+    memset(K, 0, size * sizeof(partial_key_t));
+    memset(V, 0, size * sizeof(value_t));
+  }
+
+  /**
+   * Store a value for a given key
+   * @param key: must be less than key_size bits.
+   * @param value: must be less than value_size bits. null (0) value is used to encode missing data
+   */
+  void put(key_t key, value_t value) {
+    size_t pos = index(key);
+    K[pos] = key; // key is possibly trucated as key_t is possibly less than key_size bits.
+    V[pos] = value;
+  }
+
+  /**
+   * Get the value of a key
+   * @param key: must be less than key_size bits.
+   * @return value_size bits value associated with the key if present, 0 otherwise.
+   */
+  value_t get(key_t key) const {
+    size_t pos = index(key);
+    if(K[pos] == (partial_key_t)key) return V[pos]; // need to cast to key_t because key may be truncated due to size of key_t
+    else return 0;
+  }
+};
+
 } // namespace Connect4
 } // namespace GameSolver
 #endif
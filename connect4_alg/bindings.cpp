@@ -1,40 +1,107 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <pybind11/numpy.h>
+#include <algorithm>
+#include <cstdio>
 #include <iostream>
 #include "Position.hpp"
 #include "Solver.hpp"
+#include "SolverSession.hpp"
 
 namespace py = pybind11;
 using namespace GameSolver::Connect4;
 
+// Build a Position from a HEIGHT x WIDTH board accessor where row 0 is the bottom row.
+// Bitboards are filled directly, without an intermediate int array.
+template<typename Cells>
+static Position position_from_cells(const Cells &cell, int current_player) {
+    Position::position_t current_position = 0, mask = 0;
+    for (int col = 0; col < Position::WIDTH; col++) {
+        for (int row = 0; row < Position::HEIGHT; row++) {
+            const int value = cell(row, col);
+            if (value != 0) {
+                Position::position_t pos = Position::position_t(1) << (row + col * (Position::HEIGHT + 1));
+                mask |= pos;
+                if (value == current_player) current_position |= pos;
+            }
+        }
+    }
+    return Position(current_position, mask);
+}
+
+// Build a Position from a 2D numpy board of any supported dtype (no copy for contiguous or strided int8 boards)
+template<typename T, int Flags>
+static Position position_from_board(const py::array_t<T, Flags> &board, int current_player) {
+    if (board.ndim() != 2) {
+        throw std::runtime_error("Board must be a 2D array");
+    }
+    if (board.shape(0) != Position::HEIGHT || board.shape(1) != Position::WIDTH) {
+        throw std::runtime_error("Board must be 6x7");
+    }
+    auto r = board.template unchecked<2>();
+    return position_from_cells([&r](int i, int j) { return r(i, j); }, current_player);
+}
+
+// Analyze a stack of N boards (N x HEIGHT x WIDTH) with a single solver, returns a N x WIDTH score array
+static py::array_t<int> analyze_many(Solver &solver,
+                                     py::array_t<int8_t, py::array::c_style | py::array::forcecast> boards,
+                                     bool weak, int current_player) {
+    if (boards.ndim() != 3 || boards.shape(1) != Position::HEIGHT || boards.shape(2) != Position::WIDTH) {
+        throw std::runtime_error("Boards must be a Nx6x7 array");
+    }
+    const py::ssize_t n = boards.shape(0);
+    std::vector<Position> positions;
+    positions.reserve(n);
+    auto r = boards.unchecked<3>();
+    for (py::ssize_t k = 0; k < n; k++) {
+        positions.push_back(position_from_cells([&r, k](int i, int j) { return r(k, i, j); }, current_player));
+    }
+
+    py::array_t<int> result({n, static_cast<py::ssize_t>(Position::WIDTH)});
+    int *scores = result.mutable_data();
+    {
+        py::gil_scoped_release release;
+        for (py::ssize_t k = 0; k < n; k++) {
+            std::vector<int> column_scores = solver.analyze(positions[k], weak);
+            std::copy(column_scores.begin(), column_scores.end(), scores + k * Position::WIDTH);
+        }
+    }
+    return result;
+}
+
 PYBIND11_MODULE(connect4_alg, m) {
     m.doc() = "Python bindings for Connect4 Game Solver";
 
     py::class_<Position>(m, "Position")
         .def(py::init<>())
-        .def(py::init([](py::array_t<int> board, int current_player = 1) {
-            if (board.ndim() != 2) {
-                throw std::runtime_error("Board must be a 2D array");
-            }
-            if (board.shape(0) != Position::HEIGHT || board.shape(1) != Position::WIDTH) {
-                throw std::runtime_error("Board must be 6x7");
-            }
-            auto r = board.unchecked<2>();
-            int board_array[Position::HEIGHT][Position::WIDTH];
-            for (int i = 0; i < Position::HEIGHT; i++) {
-                for (int j = 0; j < Position::WIDTH; j++) {
-                    board_array[i][j] = r(i, j);
-                }
-            }
-            return new Position(board_array, current_player);
+        // int8 is the dtype of Board.board_array: such boards are read in place, even when strided
+        .def(py::init([](py::array_t<int8_t, 0> board, int current_player) {
+            return position_from_board(board, current_player);
         }), py::arg("board"), py::arg("current_player") = 1)
+        .def(py::init([](py::array_t<int> board, int current_player) {
+            return position_from_board(board, current_player);
+        }), py::arg("board"), py::arg("current_player") = 1)
+        .def_static("from_bitboards", [](Position::position_t current_position, Position::position_t mask) {
+            return Position(current_position, mask);
+        }, py::arg("current_position"), py::arg("mask"),
+           "Position from the bitboards of the current player's stones and of all stones (see bitboards)")
+        .def_static("from_moves", [](const std::string &moves) {
+            Position P;
+            if (P.play(moves) != moves.size()) {
+                throw py::value_error("Invalid move sequence: " + moves);
+            }
+            return P;
+        }, py::arg("moves"), "Position after a sequence of 1-based columns, e.g. \"4453\"")
+        .def("bitboards", [](const Position &pos) {
+            return py::make_tuple(pos.getCurrentPosition(), pos.getMask());
+        }, "Tuple (current_position, mask) of bitboards, see from_bitboards")
         .def("play", (void (Position::*)(Position::position_t)) &Position::play)
         .def("play", (unsigned int (Position::*)(const std::string&)) &Position::play)
         .def("can_win_next", &Position::canWinNext)
         .def("nb_moves", &Position::nbMoves)
         .def("key", &Position::key)
         .def("key3", &Position::key3)
+        .def("key3_mirrored", &Position::key3Mirrored, "True if key3 is the key of the mirrored position")
         .def("possible_non_losing_moves", &Position::possibleNonLosingMoves)
         .def("can_play", &Position::canPlay)
         .def("play_col", &Position::playCol)
@@ -57,9 +124,99 @@ PYBIND11_MODULE(connect4_alg, m) {
         .def_readonly_static("MIN_SCORE", &Position::MIN_SCORE)
         .def_readonly_static("MAX_SCORE", &Position::MAX_SCORE);
 
+    py::class_<BoundedAnalysis>(m, "BoundedAnalysis", "Result of a budgeted analysis: lower <= score <= upper for every column")
+        .def_readonly("lower", &BoundedAnalysis::lower)
+        .def_readonly("upper", &BoundedAnalysis::upper)
+        .def_readonly("best_move", &BoundedAnalysis::bestMove)
+        .def_readonly("complete", &BoundedAnalysis::complete)
+        .def("__repr__", [](const BoundedAnalysis &a) {
+            return "BoundedAnalysis(best_move=" + std::to_string(a.bestMove) + ", complete=" + (a.complete ? "True" : "False") + ")";
+        });
+
+    py::class_<SearchStats>(m, "SearchStats", "Statistics of the last search call of a Solver")
+        .def_readonly("node_count", &SearchStats::nodeCount)
+        .def_readonly("table_probes", &SearchStats::tableProbes)
+        .def_readonly("table_hits", &SearchStats::tableHits)
+        .def_readonly("book_hits", &SearchStats::bookHits)
+        .def_readonly("max_depth", &SearchStats::maxDepth)
+        .def_readonly("elapsed", &SearchStats::elapsed)
+        .def_readonly("exhausted", &SearchStats::exhausted)
+        .def_property_readonly("table_hit_rate", [](const SearchStats &s) {
+            return s.tableProbes ? double(s.tableHits) / s.tableProbes : 0.0;
+        })
+        .def("__repr__", [](const SearchStats &s) {
+            char buffer[192];
+            std::snprintf(buffer, sizeof(buffer), "SearchStats(nodes=%llu, elapsed=%.3fs, table_hits=%llu/%llu, book_hits=%llu, max_depth=%d%s)",
+                          s.nodeCount, s.elapsed, s.tableHits, s.tableProbes, s.bookHits, s.maxDepth, s.exhausted ? ", exhausted" : "");
+            return std::string(buffer);
+        });
+
+    // A Solver owns a mutable transposition table and is not thread-safe:
+    // use one Solver per thread, or guard a shared one with a lock.
+    // solve/analyze release the GIL while searching so other Python threads keep running.
     py::class_<Solver>(m, "Solver")
-        .def(py::init<>())
-        .def("solve", &Solver::solve)
-        .def("analyze", &Solver::analyze);
+        .def(py::init<int>(), py::arg("table_size") = static_cast<int>(Solver::DEFAULT_TABLE_SIZE),
+             "Solver with a transposition table of 2^table_size entries (5 bytes each)")
+        .def("table_size", &Solver::getTableSize)
+        .def_readonly_static("MIN_TABLE_SIZE", &Solver::MIN_TABLE_SIZE)
+        .def_readonly_static("MAX_TABLE_SIZE", &Solver::MAX_TABLE_SIZE)
+        .def_readonly_static("DEFAULT_TABLE_SIZE", &Solver::DEFAULT_TABLE_SIZE)
+        .def_readonly_static("INVALID_MOVE", &Solver::INVALID_MOVE)
+        .def("solve", &Solver::solve, py::arg("position"), py::arg("weak") = false,
+             py::call_guard<py::gil_scoped_release>(),
+             "Score of a position. Releases the GIL; a Solver must not be shared between threads without a lock.")
+        .def("analyze", [](Solver &solver, const Position &P, bool weak, int n_threads) {
+            return solver.analyzeParallel(P, n_threads, weak);
+        }, py::arg("position"), py::arg("weak") = false, py::arg("n_threads") = 1,
+             py::call_guard<py::gil_scoped_release>(),
+             "Scores of every column of a position. With n_threads > 1 the columns are spread across threads, "
+             "each with its own persistent transposition table. "
+             "Releases the GIL; a Solver must not be shared between threads without a lock.")
+        .def("best_move", &Solver::bestMove, py::arg("position"), py::arg("weak") = false, py::arg("time_limit") = 0.0,
+             py::arg("node_limit") = 0, py::arg("n_threads") = 1, py::call_guard<py::gil_scoped_release>(),
+             "A best column of a position (-1 if none is playable), without computing the exact score of every column. "
+             "Stops after time_limit seconds and/or node_limit nodes (0: no limit) with the best column proven so far. "
+             "With n_threads > 1, the best move of analyze_bounded with n_threads. Releases the GIL.")
+        .def("analyze_bounded", &Solver::analyzeBounded, py::arg("position"), py::arg("time_limit") = 0.0,
+             py::arg("node_limit") = 0, py::arg("weak") = false, py::arg("n_threads") = 1, py::call_guard<py::gil_scoped_release>(),
+             "Analyze within time_limit seconds and/or node_limit nodes (0: no limit). "
+             "Returns the best move found so far and score bounds for every column. "
+             "With n_threads > 1 the columns are spread across threads sharing the deadline. Releases the GIL.")
+        .def("analyze_many", &analyze_many, py::arg("boards"), py::arg("weak") = false, py::arg("current_player") = 1,
+             "Scores of every column for a Nx6x7 stack of boards, as a Nx7 array. "
+             "All boards share the solver's transposition table. Releases the GIL.")
+        .def("reset", &Solver::reset)
+        .def("load_book", &Solver::loadBook, py::arg("book_file"),
+             "Load an opening book file (see build_book.py). Returns True on success.")
+        .def("book_depth", &Solver::getBookDepth)
+        .def("get_node_count", &Solver::getNodeCount)
+        .def("last_stats", &Solver::getLastStats,
+             "SearchStats of the last solve/analyze/analyze_bounded call (the last board of analyze_many)");
+
+    // Same thread-safety contract as Solver: one session per thread, or a lock around it.
+    py::class_<SolverSession>(m, "SolverSession")
+        .def(py::init<int>(), py::arg("table_size") = static_cast<int>(Solver::DEFAULT_TABLE_SIZE),
+             "Solver following a game move by move, its transposition table is kept between moves")
+        .def("play", &SolverSession::play, py::arg("col"), "Play a 0-based column in the followed position")
+        .def("can_play", &SolverSession::canPlay, py::arg("col"))
+        .def("nb_moves", &SolverSession::nbMoves)
+        .def("position", [](const SolverSession &session) { return Position(session.getPosition()); },
+             "Copy of the followed position")
+        .def("analyze", &SolverSession::analyze, py::arg("weak") = false, py::arg("n_threads") = 1,
+             py::call_guard<py::gil_scoped_release>(), "Scores of every column of the followed position")
+        .def("best_move", &SolverSession::bestMove, py::arg("weak") = false, py::arg("time_limit") = 0.0, py::arg("node_limit") = 0,
+             py::arg("n_threads") = 1, py::call_guard<py::gil_scoped_release>(), "A best column of the followed position, see Solver.best_move")
+        .def("solve", &SolverSession::solve, py::arg("weak") = false,
+             py::call_guard<py::gil_scoped_release>(), "Score of the followed position")
+        .def("analyze_bounded", &SolverSession::analyzeBounded, py::arg("time_limit") = 0.0, py::arg("node_limit") = 0,
+             py::arg("weak") = false, py::arg("n_threads") = 1, py::call_guard<py::gil_scoped_release>(),
+             "Budgeted analysis of the followed position, see Solver.analyze_bounded")
+        .def("analyze_position", &SolverSession::analyzePosition, py::arg("position"), py::arg("weak") = false, py::arg("n_threads") = 1,
+             py::call_guard<py::gil_scoped_release>(), "Scores of every column of any position, with the session table")
+        .def("new_game", &SolverSession::newGame, "Follow a new game from the empty position, keeping the table")
+        .def("load_book", &SolverSession::loadBook, py::arg("book_file"))
+        .def("table_size", [](SolverSession &session) { return session.getSolver().getTableSize(); })
+        .def("last_stats", [](SolverSession &session) { return session.getSolver().getLastStats(); },
+             "SearchStats of the last search of the session");
 }
 
@@ -0,0 +1,119 @@
+"""
+Build the opening book loaded by connect4_alg.Solver.load_book.
+
+Every position up to `depth` moves is enumerated once per symmetry (like `explore` in generator.cpp).
+Only the deepest positions are solved with the solver, shallower ones are scored by negamax
+over their already scored children. The scored positions are then piped into the `generator`
+binary (compiled from generator.cpp), which writes the book file.
+
+usage: python connect4_alg/build_book.py [-d DEPTH] [-j JOBS] [-o OUTPUT_DIR]
+"""
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from connect4_alg import Position, Solver
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+BOOK_NAME = f"{Position.WIDTH}x{Position.HEIGHT}.book"
+MAX_BOOK_DEPTH = 14 # MAX_BOOK_DEPTH of generator.cpp
+
+def position_from_moves(moves: str):
+    position = Position()
+    position.play(moves)
+    return position
+
+def enumerate_positions(depth):
+    """
+    :param depth:
+        Maximum number of moves of the enumerated positions
+    :return:
+        List of dictionaries (one per depth) of symmetric key3 -> move sequence
+    """
+    levels = [{Position().key3(): ""}]
+    for _ in range(depth):
+        next_level = {}
+        for moves in levels[-1].values():
+            position = position_from_moves(moves)
+            for col in range(Position.WIDTH):
+                if position.can_play(col) and not position.is_winning_move(col):
+                    child = position_from_moves(moves)
+                    child.play_col(col)
+                    next_level.setdefault(child.key3(), moves + str(col + 1))
+        levels.append(next_level)
+    return levels
+
+_solver = None
+
+def _solve(moves):
+    global _solver
+    if _solver is None:
+        _solver = Solver()
+    return _solver.solve(position_from_moves(moves), False)
+
+def score_positions(levels, n_jobs):
+    """
+    Solve the deepest level with the solver and propagate scores up to the root
+
+    :return:
+        Dictionary of key3 -> score of the position for the player to move
+    """
+    leaves = levels[-1]
+    with mp.Pool(n_jobs) as pool:
+        leaf_scores = pool.map(_solve, leaves.values(), chunksize=64)
+    scores = dict(zip(leaves.keys(), leaf_scores))
+
+    for depth in reversed(range(len(levels) - 1)):
+        for key, moves in levels[depth].items():
+            position = position_from_moves(moves)
+            if position.can_win_next():
+                scores[key] = (Position.WIDTH * Position.HEIGHT + 1 - position.nb_moves()) // 2
+                continue
+            best = Position.MIN_SCORE - 1
+            for col in range(Position.WIDTH):
+                if position.can_play(col):
+                    child = position_from_moves(moves)
+                    child.play_col(col)
+                    best = max(best, -scores[child.key3()])
+            scores[key] = best
+    return scores
+
+def compile_generator(build_dir):
+    compiler = shutil.which("g++") or shutil.which("c++")
+    if compiler is None:
+        raise RuntimeError("A C++ compiler (g++) is required to build the opening book generator")
+    executable = os.path.join(build_dir, "generator")
+    subprocess.run([compiler, "-O3", "-std=c++17", os.path.join(SOURCE_DIR, "generator.cpp"), "-o", executable], check=True)
+    return executable
+
+def write_book(levels, scores, output_dir, depth):
+    lines = [f"{moves} {scores[key]}" for level in levels for key, moves in level.items()]
+    with tempfile.TemporaryDirectory() as build_dir:
+        generator = compile_generator(build_dir)
+        # generator -b reads "<moves> <score>" lines until an empty line and writes WIDTHxHEIGHT.book of `depth` in its cwd
+        subprocess.run([generator, "-b", str(depth)], input="\n".join(lines) + "\n\n", text=True, cwd=output_dir, check=True)
+    return os.path.join(output_dir, BOOK_NAME)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--depth", type=int, default=10, help=f"Max number of moves of the book positions (Default: 10, Max: {MAX_BOOK_DEPTH})")
+    parser.add_argument("-j", "--jobs", type=int, default=mp.cpu_count(), help="Number of solver processes (Default: number of CPUs)")
+    parser.add_argument("-o", "--output-dir", type=str, default=".", help="Directory where the book is written (Default: current directory)")
+    args = parser.parse_args()
+
+    if not 0 <= args.depth <= MAX_BOOK_DEPTH:
+        parser.error(f"depth must be between 0 and {MAX_BOOK_DEPTH}")
+
+    start_time = time.time()
+    levels = enumerate_positions(args.depth)
+    print(f"Enumerated {sum(len(level) for level in levels)} positions up to depth {args.depth}")
+
+    scores = score_positions(levels, args.jobs)
+    book_file = write_book(levels, scores, os.path.abspath(args.output_dir), args.depth)
+
+    minutes, seconds = divmod(time.time() - start_time, 60)
+    print(f"Wrote {book_file} in {int(minutes)} minutes and {seconds:.2f} seconds")
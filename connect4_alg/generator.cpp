@@ -34,15 +34,18 @@ void explore(const Position &P, char* pos_str, const int depth) {
     }
 }
 
+static constexpr int MAX_BOOK_DEPTH = 14; // max depth of every position to be stored
+
 /**
  * Read scored positions from stdin and store them in an opening book
  *
  * Input lines must be a valid position (possibly empty string), a space and a valid score
  * Read input until EOF or an empty line is reached.
+ * @param depth: depth of the book (at most MAX_BOOK_DEPTH), deeper positions are ignored
  */
-void generate_opening_book() {
+void generate_opening_book(const int depth) {
   static constexpr int BOOK_SIZE = 23; // store 2^BOOK_SIZE positions in the book
-  static constexpr int DEPTH = 14;     // max depth of every position to be stored
+  static constexpr int DEPTH = MAX_BOOK_DEPTH; // sizes the stored partial keys
   static constexpr double LOG_3 = 1.58496250072; // log2(3)
   TranspositionTable<uint_t<int((DEPTH + Position::WIDTH -1) * LOG_3) + 1 - BOOK_SIZE>, Position::position_t, uint8_t, BOOK_SIZE> *table =
     new TranspositionTable<uint_t<int((DEPTH + Position::WIDTH -1) * LOG_3) + 1 - BOOK_SIZE>, Position::position_t, uint8_t, BOOK_SIZE>();
@@ -59,7 +62,8 @@ void generate_opening_book() {
     Position P;
     if(iss.fail() || !iss.eof()
         || P.play(pos) != pos.length()
-        || score < Position::MIN_SCORE || score > Position::MAX_SCORE) {  // a valid line is a position a space and a valid score
+        || score < Position::MIN_SCORE || score > Position::MAX_SCORE  // a valid line is a position a space and a valid score
+        || int(P.nbMoves()) > depth) {
       std::cerr << "Invalid line (line ignored): " << line << std::endl;
       continue;
     }
@@ -67,7 +71,7 @@ void generate_opening_book() {
     if(count % 1000000 == 0) std::cerr << count << std::endl;
   }
 
-  OpeningBook book{Position::WIDTH, Position::HEIGHT, DEPTH, table};
+  OpeningBook book{Position::WIDTH, Position::HEIGHT, depth, table};
 
   std::ostringstream book_file;
   book_file << Position::WIDTH << "x" << Position::HEIGHT << ".book";
@@ -76,12 +80,20 @@ void generate_opening_book() {
 
 /**
  * If used with a max depth parameter: generate all uniquepsoition upto max depth
- * If no parameter: read scoredposition from standard input to store in an opening book
+ * If used with -b and a depth: read scored positions from standard input to store in an opening book of this depth
+ * If no parameter: same with a book of depth MAX_BOOK_DEPTH
  */
 int main(int argc, char** argv) {
-  if(argc > 1) {
+  if(argc > 2 && std::string(argv[1]) == "-b") {
+    int depth = atoi(argv[2]);
+    if(depth < 0 || depth > MAX_BOOK_DEPTH) {
+      std::cerr << "Book depth must be between 0 and " << MAX_BOOK_DEPTH << std::endl;
+      return 1;
+    }
+    generate_opening_book(depth);
+  } else if(argc > 1) {
     int depth = atoi(argv[1]);
     char pos_str[depth + 1] = {0};
     explore(Position(), pos_str, depth);
-  } else generate_opening_book();
+  } else generate_opening_book(MAX_BOOK_DEPTH);
 }
@@ -2,15 +2,120 @@ import os
 import numpy as np
 import modules.board_param as param
 
+def _window_indices():
+	"""
+	Returns the flat indices in a board array of the cells of every window of param.WINDOW_LENGTH cells
+	(horizontal, vertical, positive and negative diagonals), as a n_windows x param.WINDOW_LENGTH array
+	"""
+	cells = np.arange(param.ROW_COUNT * param.COLUMN_COUNT).reshape(param.ROW_COUNT, param.COLUMN_COUNT)
+	windows = []
+	for r in range(param.ROW_COUNT):
+		for c in range(param.COLUMN_COUNT - param.WINDOW_LENGTH + 1):
+			windows.append(cells[r, c:c + param.WINDOW_LENGTH])
+	for c in range(param.COLUMN_COUNT):
+		for r in range(param.ROW_COUNT - param.WINDOW_LENGTH + 1):
+			windows.append(cells[r:r + param.WINDOW_LENGTH, c])
+	for r in range(param.ROW_COUNT - param.WINDOW_LENGTH + 1):
+		for c in range(param.COLUMN_COUNT - param.WINDOW_LENGTH + 1):
+			windows.append([cells[r + i, c + i] for i in range(param.WINDOW_LENGTH)])
+			windows.append([cells[r + param.WINDOW_LENGTH - 1 - i, c + i] for i in range(param.WINDOW_LENGTH)])
+	return np.array(windows)
+
+WINDOW_INDICES = _window_indices()
+
+def score_positions(boards, piece):
+	"""
+	Heuristic score of one or more boards for `piece`, see Board.score_position and Board.evaluate_window.
+	All windows of all boards are evaluated at once.
+
+	:param boards: N x 6 x 7 array (or a single 6 x 7 board) of board arrays
+	:return: int array of the N scores
+	"""
+	boards = np.asarray(boards).reshape(-1, param.ROW_COUNT * param.COLUMN_COUNT)
+	opp_piece = param.BOT_PIECE if piece == param.PLAYER_PIECE else param.PLAYER_PIECE
+
+	windows = boards[:, WINDOW_INDICES] # N x n_windows x param.WINDOW_LENGTH
+	n_own = np.count_nonzero(windows == piece, axis=2)
+	n_opp = np.count_nonzero(windows == opp_piece, axis=2)
+	n_empty = np.count_nonzero(windows == param.EMPTY, axis=2)
+
+	# Same priorities as evaluate_window
+	window_scores = np.select(
+		[n_own == param.WINDOW_LENGTH,
+		 (param.WINDOW_LENGTH > 2) & (n_own == param.WINDOW_LENGTH - 1) & (n_empty == 1),
+		 (param.WINDOW_LENGTH > 3) & (n_own == param.WINDOW_LENGTH - 2) & (n_empty == 2)],
+		[100, 5, 2], 0)
+	window_scores -= 50 * ((n_opp == param.WINDOW_LENGTH) & (n_empty == 1))
+
+	# Score centre column
+	centre = boards.reshape(-1, param.ROW_COUNT, param.COLUMN_COUNT)[:, :, param.COLUMN_COUNT // 2]
+	centre_scores = np.count_nonzero(centre == piece, axis=1) * (param.WINDOW_LENGTH - 1)
+	return window_scores.sum(axis=1) + centre_scores
+
 class Board:
+	# No instance __dict__: boards are copied in the bots' hot loops (see clone)
+	__slots__ = ("board_array", "last_play", "_lines", "_winning_line", "_history", "score")
+
 	def __init__(self, *args):
 		if len(args) == 1 and isinstance(args[0], np.ndarray) and args[0].ndim == 2:
 			self.board_array = args[0]
 		else:
 			self.board_array = np.zeros((param.ROW_COUNT, param.COLUMN_COUNT), dtype=np.int8)
 
-		self.winning_cells = []
 		self.last_play = (-1, -1)
+		# A line of each piece that has one (bottom row first coordinates), updated around each dropped piece.
+		# None until the board given to the constructor has been scanned once: after that, winning_move does not see
+		# pieces written directly in board_array (play with drop_piece/push, or build a new Board to rescan)
+		self._lines = None if len(args) == 1 else {}
+		self._winning_line = None # line of the last successful winning_move call, see winning_cells
+		self._history = [] # state restored by pop for each push
+
+	def clone(self):
+		"""
+		Returns an independent copy of the board, much cheaper than copy.deepcopy
+		"""
+		board = Board.__new__(Board)
+		board.board_array = self.board_array.copy()
+		board.last_play = self.last_play
+		board._lines = None if self._lines is None else dict(self._lines) # lines themselves are never modified
+		board._winning_line = self._winning_line
+		board._history = self._history.copy()
+		return board
+
+	def push(self, col, piece):
+		"""
+		Drop a piece in a column, to be undone by pop (search in place instead of copying the board)
+		"""
+		if not self.is_valid_location(col):
+			raise ValueError(f"Column {col} is full")
+		if self._lines is None:
+			self._lines = self._scan_lines() # pop only undoes the lines found around pushed pieces
+		self._history.append((piece, self.last_play, piece in self._lines, self._winning_line))
+		self.drop_piece(col, piece)
+
+	def pop(self):
+		"""
+		Undo the last push, restoring last_play and the win state
+
+		:return: Column of the undone move
+		"""
+		piece, last_play, had_line, winning_line = self._history.pop()
+		row, col = self.last_play
+		self.board_array[row][col] = param.EMPTY
+		if not had_line:
+			self._lines.pop(piece, None)
+		self.last_play = last_play
+		self._winning_line = winning_line
+		return col
+
+	@property
+	def winning_cells(self):
+		"""
+		Cells of a line of the last piece found winning by winning_move, in the flipped rows of pretty_print_board
+		"""
+		if self._winning_line is None:
+			return []
+		return [(param.ROW_COUNT - 1 - row, col) for row, col in self._winning_line]
 		
 	def pretty_print_board(self):
 		flipped_last_play = (5 - self.last_play[0], self.last_play[1])
@@ -97,81 +202,55 @@ class Board:
 			if self.board_array[row][col] == 0:
 				self.board_array[row][col] = piece
 				self.last_play = (row, col)
+				# A new line goes through the dropped piece
+				if self._lines is not None and piece not in self._lines:
+					line = self._line_through(row, col, piece)
+					if line is not None:
+						self._lines[piece] = line
 				break
 
 	def winning_move(self, piece):
-		flipped_board = np.flipud(self.board_array)
+		if self._lines is None:
+			self._lines = self._scan_lines()
+		self._winning_line = self._lines.get(piece)
+		return self._winning_line is not None
 
-		# Check valid horizontal locations for win
-		for c in range(param.COLUMN_COUNT - param.WINDOW_LENGTH + 1):
-			for r in range(param.ROW_COUNT):
-				if all(flipped_board[r][c + i] == piece for i in range(param.WINDOW_LENGTH)):
-					self.winning_cells = [(r, c + i) for i in range(param.WINDOW_LENGTH)]
-					return True
-
-		# Check valid vertical locations for win
-		for c in range(param.COLUMN_COUNT):
-			for r in range(param.ROW_COUNT - param.WINDOW_LENGTH + 1):
-				if all(flipped_board[r + i][c] == piece for i in range(param.WINDOW_LENGTH)):
-					self.winning_cells = [(r + i, c) for i in range(param.WINDOW_LENGTH)]
-					return True
-
-		# Check valid positive diagonal locations for win
-		for c in range(param.COLUMN_COUNT - param.WINDOW_LENGTH + 1):
-			for r in range(param.ROW_COUNT - param.WINDOW_LENGTH + 1):
-				if all(flipped_board[r + i][c + i] == piece for i in range(param.WINDOW_LENGTH)):
-					self.winning_cells = [(r + i, c + i) for i in range(param.WINDOW_LENGTH)]
-					return True
-
-		# check valid negative diagonal locations for win
-		for c in range(param.COLUMN_COUNT - param.WINDOW_LENGTH + 1):
-			for r in range(param.WINDOW_LENGTH - 1, param.ROW_COUNT):
-				if all(flipped_board[r - i][c + i] == piece for i in range(param.WINDOW_LENGTH)):
-					self.winning_cells = [(r - i, c + i) for i in range(param.WINDOW_LENGTH)]
-					return True
-
-		self.winning_cells = []
-		return False
+	def _line_through(self, row, col, piece):
+		"""
+		Returns the cells of a line of param.WINDOW_LENGTH `piece` through (row, col), None if there is none
+		"""
+		for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+			# Count the pieces on both sides of (row, col)
+			n_before = 0
+			r, c = row - d_row, col - d_col
+			while n_before < param.WINDOW_LENGTH - 1 and 0 <= r < param.ROW_COUNT and 0 <= c < param.COLUMN_COUNT and self.board_array[r][c] == piece:
+				n_before += 1
+				r, c = r - d_row, c - d_col
+			n_after = 0
+			r, c = row + d_row, col + d_col
+			while n_before + n_after < param.WINDOW_LENGTH - 1 and 0 <= r < param.ROW_COUNT and 0 <= c < param.COLUMN_COUNT and self.board_array[r][c] == piece:
+				n_after += 1
+				r, c = r + d_row, c + d_col
+
+			if n_before + n_after + 1 >= param.WINDOW_LENGTH:
+				return [(row + (i - n_before) * d_row, col + (i - n_before) * d_col) for i in range(param.WINDOW_LENGTH)]
+		return None
+
+	def _scan_lines(self):
+		"""
+		Returns a line of each piece that has one, by looking around every piece of the board
+		"""
+		lines = {}
+		for row, col in np.argwhere(self.board_array != param.EMPTY).tolist():
+			piece = int(self.board_array[row][col])
+			if piece not in lines:
+				line = self._line_through(row, col, piece)
+				if line is not None:
+					lines[piece] = line
+		return lines
 
 	def score_position(self, piece):
-		score = 0
-
-		# Score centre column
-		centre_array = [int(i) for i in list(self.board_array[:, param.COLUMN_COUNT // 2])]
-		centre_count = centre_array.count(piece)
-		score += centre_count * (param.WINDOW_LENGTH - 1)
-
-		# Score horizontal positions
-		for r in range(param.ROW_COUNT):
-			row_array = [int(i) for i in list(self.board_array[r, :])]
-			for c in range(param.COLUMN_COUNT - param.WINDOW_LENGTH + 1):
-				# Create a horizontal window of 4
-				window = row_array[c:c + param.WINDOW_LENGTH]
-				score += Board.evaluate_window(window, piece)
-
-		# Score vertical positions
-		for c in range(param.COLUMN_COUNT):
-			col_array = [int(i) for i in list(self.board_array[:, c])]
-			for r in range(param.ROW_COUNT - param.WINDOW_LENGTH + 1):
-				# Create a vertical window of 4
-				window = col_array[r:r + param.WINDOW_LENGTH]
-				score += Board.evaluate_window(window, piece)
-
-		# Score positive diagonals
-		for r in range(param.ROW_COUNT - param.WINDOW_LENGTH + 1):
-			for c in range(param.COLUMN_COUNT - param.WINDOW_LENGTH + 1):
-				# Create a positive diagonal window of 4
-				window = [self.board_array[r + i][c + i] for i in range(param.WINDOW_LENGTH)]
-				score += Board.evaluate_window(window, piece)
-
-		# Score negative diagonals
-		for r in range(param.ROW_COUNT - param.WINDOW_LENGTH + 1):
-			for c in range(param.COLUMN_COUNT - param.WINDOW_LENGTH + 1):
-				# Create a negative diagonal window of 4
-				window = [self.board_array[r + param.WINDOW_LENGTH - 1 - i][c + i] for i in range(param.WINDOW_LENGTH)]
-				score += Board.evaluate_window(window, piece)
-
-		return score
+		return int(score_positions(self.board_array, piece)[0])
 
 	@staticmethod
 	def evaluate_window(window, piece):
@@ -221,3 +300,131 @@ class Board:
 					print(f"{'PLAYER ' if piece == param.PLAYER_PIECE else 'BOT'} WINS!")
 				return True  # Game over
 		return False  # Game continues
+
+
+# Bitboard layout of connect4_alg/Position.hpp: bit col * (ROW_COUNT + 1) + row, row 0 at the bottom,
+# with an always empty bit on top of each column so that shifted lines never wrap to the next column
+_COLUMN_BITS = param.ROW_COUNT + 1
+# Bit shift between two consecutive cells of a line: vertical, horizontal, both diagonals
+_DIRECTIONS = (1, _COLUMN_BITS, _COLUMN_BITS - 1, _COLUMN_BITS + 1)
+
+class BitBoard(Board):
+	"""
+	Board stored as one bitboard per piece plus the height of each column, with the same public methods as Board.
+	Moves and win checks are a few integer operations, board_array and winning_cells are built on demand for display.
+	"""
+	__slots__ = ("_pieces", "_heights", "_winner")
+
+	def __init__(self, *args):
+		self._pieces = {param.BOT_PIECE: 0, param.PLAYER_PIECE: 0}
+		self._heights = [0] * param.COLUMN_COUNT
+		self._winner = None # piece of the last successful winning_move call, see winning_cells
+		self.last_play = (-1, -1)
+		self._history = [] # state restored by pop for each push
+
+		if len(args) == 1 and isinstance(args[0], np.ndarray) and args[0].ndim == 2:
+			for (row, col), cell in np.ndenumerate(args[0]):
+				if cell != param.EMPTY:
+					self._pieces[cell] |= 1 << (col * _COLUMN_BITS + row)
+					self._heights[col] = max(self._heights[col], row + 1)
+
+	def clone(self):
+		"""
+		Returns an independent copy of the board, much cheaper than copy.deepcopy
+		"""
+		board = BitBoard.__new__(BitBoard)
+		board._pieces = dict(self._pieces)
+		board._heights = self._heights.copy()
+		board._winner = self._winner
+		board.last_play = self.last_play
+		board._history = self._history.copy()
+		return board
+
+	def push(self, col, piece):
+		"""
+		Drop a piece in a column, to be undone by pop (search in place instead of copying the board)
+		"""
+		if not self.is_valid_location(col):
+			raise ValueError(f"Column {col} is full")
+		self._history.append((piece, self.last_play, self._winner))
+		self.drop_piece(col, piece)
+
+	def pop(self):
+		"""
+		Undo the last push, restoring last_play and the win state
+
+		:return: Column of the undone move
+		"""
+		piece, last_play, winner = self._history.pop()
+		row, col = self.last_play
+		self._pieces[piece] ^= 1 << (col * _COLUMN_BITS + row)
+		self._heights[col] = row
+		self.last_play = last_play
+		self._winner = winner
+		return col
+
+	# board_array is a property here: copy and pickle the bitboards instead of the slots of Board
+	def __getstate__(self):
+		return {"_pieces": self._pieces, "_heights": self._heights, "_winner": self._winner, "last_play": self.last_play,
+				"_history": self._history}
+
+	def __setstate__(self, state):
+		for name, value in state.items():
+			setattr(self, name, value)
+
+	@property
+	def board_array(self):
+		board_array = np.zeros((param.ROW_COUNT, param.COLUMN_COUNT), dtype=np.int8)
+		for piece, position in self._pieces.items():
+			bits = np.unpackbits(np.frombuffer(position.to_bytes(8, "little"), dtype=np.uint8), bitorder="little")
+			cells = bits[:param.COLUMN_COUNT * _COLUMN_BITS].reshape(param.COLUMN_COUNT, _COLUMN_BITS)[:, :param.ROW_COUNT].T
+			board_array[cells == 1] = piece
+		return board_array
+
+	@property
+	def winning_cells(self):
+		"""
+		Cells of a line of the last piece found winning by winning_move, in the flipped rows of pretty_print_board
+		"""
+		if self._winner is None:
+			return []
+		position = self._pieces[self._winner]
+		for shift in _DIRECTIONS:
+			starts = BitBoard._line_starts(position, shift)
+			if starts:
+				start = (starts & -starts).bit_length() - 1 # lowest line
+				cells = [start + i * shift for i in range(param.WINDOW_LENGTH)]
+				return [(param.ROW_COUNT - 1 - bit % _COLUMN_BITS, bit // _COLUMN_BITS) for bit in cells]
+		return []
+
+	@staticmethod
+	def _line_starts(position, shift):
+		# Bits of `position` that start a line of WINDOW_LENGTH bits in the direction `shift`
+		starts = position
+		for i in range(1, param.WINDOW_LENGTH):
+			starts &= position >> (i * shift)
+		return starts
+
+	def get_valid_locations(self):
+		"""
+		Returns list of valid columns that can be played
+		"""
+		return [col for col, height in enumerate(self._heights) if height < param.ROW_COUNT]
+
+	def is_valid_location(self, col):
+		return self._heights[col] < param.ROW_COUNT
+
+	def drop_piece(self, col, piece):
+		row = self._heights[col]
+		if row < param.ROW_COUNT:
+			self._pieces[piece] |= 1 << (col * _COLUMN_BITS + row)
+			self._heights[col] = row + 1
+			self.last_play = (row, col)
+
+	def winning_move(self, piece):
+		position = self._pieces[piece]
+		if any(BitBoard._line_starts(position, shift) for shift in _DIRECTIONS):
+			self._winner = piece
+			return True
+		self._winner = None
+		return False
@@ -1,7 +1,6 @@
 # code from https://roboticsproject.readthedocs.io/en/latest/ConnectFourAlgorithm.html
 import argparse
 import json
-import os
 import time
 import random
 import logging
@@ -13,7 +12,7 @@ from multiprocessing import Manager
 from camera_grid import Grid
 from camera import Camera
 from game_board import Board
-from plays import easy_play, medium_play, hard_play, optimal_play
+from plays import easy_play, medium_play, hard_play, optimal_play, load_lookup_table, ponderer, solver_pool
 
 import modules.board_param as param
 
@@ -77,13 +76,13 @@ def get_move_message(quality):
     """Get a random message for the move quality"""
     return random.choice(move_messages.get(quality, ["Move made."]))
 
-def evaluate_player_move(board, col, lookup_table, shared_dict):
+def evaluate_player_move(board, col, lookup_table, shared_dict, session=None):
     """Evaluate player's move and store feedback in shared_dict"""
     try:
         from plays.plays import calculate_board_scores
 
         # Get scores for current board position
-        scores = calculate_board_scores(board.board_array, lookup_table)
+        scores = calculate_board_scores(board.board_array, lookup_table, session)
 
         if scores:
             quality = evaluate_move_quality(board, col, scores)
@@ -103,36 +102,39 @@ def evaluate_player_move(board, col, lookup_table, shared_dict):
     except Exception as e:
         logger.error(f"Error in move evaluation: {e}")
 
-def update_training_scores(board, lookup_table, shared_dict):
+def update_training_scores(board, lookup_table, shared_dict, session=None):
     """Update scores for training mode display"""
     training_mode = shared_dict.get("training_mode", False)
     if training_mode:
         try:
             from plays.plays import calculate_board_scores
-            scores = calculate_board_scores(board.board_array, lookup_table)
+            scores = calculate_board_scores(board.board_array, lookup_table, session)
             if scores:
                 shared_dict["scores"] = scores
                 logger.info("Training mode scores updated")
         except Exception as e:
             logger.error(f"Error updating training scores: {e}")
 
-def play_game(shared_dict, level, bot_first, play_in_terminal, no_print):
-    lookup_table_loc = 'lookup_table_till_move_10.json'
+def play_game(shared_dict, level, bot_first, play_in_terminal, no_print, lookup_table=None):
+    """
+    :param lookup_table: Lookup table attached by the caller (e.g. LookupTableService of the API),
+        loaded from lookup_table_till_move_10 if None
+    """
+    if lookup_table is None:
+        lookup_table_loc = 'lookup_table_till_move_10' # .bin (see LookupTable) or .json
 
-    if os.path.isfile(lookup_table_loc):
-        with open(lookup_table_loc, 'r') as file:
-            lookup_table = json.load(file)
+        lookup_table = load_lookup_table(lookup_table_loc)
+        if len(lookup_table) > 0:
             print(f"Loaded lookup table with {len(lookup_table)} entries.")
-    else:
-        print(f"The file '{lookup_table_loc}' does not exist.")
-        lookup_table = dict()
-
-    # Store lookup table in shared_dict for API access
-    shared_dict['lookup_table'] = lookup_table
+        else:
+            print(f"The file '{lookup_table_loc}.bin' (or .json) does not exist.")
 
     # Load move messages for feedback system
     load_move_messages()
 
+    # Solver following this game, built (with the opening book) before the first move
+    session = solver_pool.new_session()
+
     board = Board()
     shared_dict['board'] = board.board_array
     shared_dict['valid_moves'] = board.get_valid_locations()
@@ -145,7 +147,7 @@ def play_game(shared_dict, level, bot_first, play_in_terminal, no_print):
         'easy': easy_play,
         'medium': medium_play,
         'hard': hard_play,
-        'impossible': lambda board: optimal_play(board, lookup_table),
+        'impossible': lambda board: optimal_play(board, lookup_table, session),
     }
     winner = param.EMPTY
 
@@ -182,12 +184,13 @@ def play_game(shared_dict, level, bot_first, play_in_terminal, no_print):
                             col = shared_dict.pop('player_move') # Use pop to consume the move
                             if 0 <= col < param.COLUMN_COUNT and board.is_valid_location(col):
                                 valid_move = True
+                                ponderer.stop() # hands its solver back before the evaluation
 
                                 # Evaluate move quality and provide feedback (skip for first move)
                                 total_moves = np.sum(board.board_array != 0)
                                 if total_moves > 0:
                                     logger.info("Evaluating player move...")
-                                    evaluate_player_move(board, col, lookup_table, shared_dict)
+                                    evaluate_player_move(board, col, lookup_table, shared_dict, session)
                                 else:
                                     logger.info("First move - skipping feedback message")
                             else:
@@ -216,15 +219,17 @@ def play_game(shared_dict, level, bot_first, play_in_terminal, no_print):
                         valid_move = True
                         shared_dict['last_player_move'] = col  # Store the move
 
+            ponderer.stop()
             if col is None: # Safeguard
                 continue
             game_over = board.play_turn(col, param.PLAYER_PIECE)
+            session.play(col)
             shared_dict['board'] = board.board_array
             if game_over:
                 winner = param.PLAYER_PIECE
             else:
                 # Update training scores after player move if not game over
-                update_training_scores(board, lookup_table, shared_dict)
+                update_training_scores(board, lookup_table, shared_dict, session)
         else:
             col = play_alg[level](board)
             played_pos = -1
@@ -256,11 +261,15 @@ def play_game(shared_dict, level, bot_first, play_in_terminal, no_print):
                 shared_dict["magazine_2_empty"] = motor_controller.is_loader_empty(2)
 
             game_over = board.play_turn(col, param.BOT_PIECE)
+            session.play(col)
             if game_over:
                 winner = param.BOT_PIECE
             else:
                 # Update training scores after bot move if not game over
-                update_training_scores(board, lookup_table, shared_dict)
+                update_training_scores(board, lookup_table, shared_dict, session)
+                if level == 'impossible':
+                    # Analyze the replies of the player while they think
+                    ponderer.start(board.board_array, lookup_table)
 
         if len(board.get_valid_locations()) == 0 and not game_over:
             board.pretty_print_board()
@@ -275,6 +284,7 @@ def play_game(shared_dict, level, bot_first, play_in_terminal, no_print):
         shared_dict['winner'] = winner if game_over else None
         shared_dict['turn'] = turn
 
+    ponderer.stop()
     board.print_final_score(winner)
     shared_dict['game_over'] = True
 
@@ -324,7 +334,8 @@ def start_game(shared_dict, args):
         print("Terminal mode")
 
     print(f"Difficulty level: {args.level[0]}")
-    play_game(shared_dict, args.level[0], args.bot_first, (args.no_camera or args.t), args.no_print)
+    play_game(shared_dict, args.level[0], args.bot_first, (args.no_camera or args.t), args.no_print,
+              getattr(args, "lookup_table", None))
 
     if not args.no_camera and not args.t:
         camera_process.join()
@@ -1,10 +1,33 @@
-from .plays import board2key, is_terminal_node, easy_play, medium_play, hard_play, optimal_play
+from .plays import board2key, analyze_many, calculate_board_outcomes, board_outcome, is_terminal_node, easy_play, medium_play, hard_play, optimal_play
+from ._keys import board_key3, board_keys3
+from ._lookup_table import LookupTable, load_lookup_table
+from ._solver_pool import SolverPool, solver_pool
+from ._table_service import LookupTableService
+from ._result_cache import ResultCache, result_cache
+from ._position_log import PositionLog, get_position_log
+from ._ponder import Ponderer, ponderer
 
 __all__ = [
     "board2key",
+    "board_key3",
+    "board_keys3",
+    "analyze_many",
+    "calculate_board_outcomes",
+    "board_outcome",
     "is_terminal_node",
     "easy_play",
     "medium_play",
     "hard_play",
     "optimal_play",
+    "LookupTable",
+    "load_lookup_table",
+    "LookupTableService",
+    "ResultCache",
+    "result_cache",
+    "PositionLog",
+    "get_position_log",
+    "Ponderer",
+    "ponderer",
+    "SolverPool",
+    "solver_pool",
 ]
\ No newline at end of file
@@ -0,0 +1,60 @@
+import numpy as np
+
+from connect4_alg import Position
+import modules.board_param as param
+
+# Keys are computed in uint64 like Position.key3: a position with more moves than this may
+# overflow 64 bits (N moves use N + COLUMN_COUNT base 3 digits) and share its key with another one
+MAX_KEY3_MOVES = 33
+
+_POW3 = 3 ** np.arange(param.ROW_COUNT + 2, dtype=np.uint64)
+
+def board_keys(boards):
+    """
+    Base 3 keys of a batch of boards, in both column orders (see Position.key3)
+
+    :param boards: N x 6 x 7 array (or a single 6 x 7 board) of board arrays, param.BOT_PIECE to play
+    :return: (forward keys, reverse keys) as uint64 arrays of length N, before the division by 3
+        (forward iterates the columns from left to right, reverse from right to left)
+    """
+    boards = np.asarray(boards).reshape(-1, param.ROW_COUNT, param.COLUMN_COUNT)
+    digits = np.where(boards == param.BOT_PIECE, 1, np.where(boards == param.PLAYER_PIECE, 2, 0)).astype(np.uint64)
+    heights = np.count_nonzero(boards, axis=1)
+
+    # base 3 value of each column: one digit per stone from bottom to top, then a 0 digit
+    columns = np.zeros((len(boards), param.COLUMN_COUNT), dtype=np.uint64)
+    for row in range(param.ROW_COUNT):
+        columns = np.where(row < heights, columns * np.uint64(3) + digits[:, row], columns)
+    columns *= np.uint64(3)
+    shifts = _POW3[heights + 1]
+
+    forward = np.zeros(len(boards), dtype=np.uint64)
+    reverse = np.zeros(len(boards), dtype=np.uint64)
+    for col in range(param.COLUMN_COUNT):
+        forward = forward * shifts[:, col] + columns[:, col]
+        reverse = reverse * shifts[:, -1 - col] + columns[:, -1 - col]
+    return forward, reverse
+
+def board_keys3(boards):
+    """
+    Symmetric keys of a batch of boards, equal to Position(board).key3()
+
+    :param boards: N x 6 x 7 array (or a single 6 x 7 board) of board arrays, param.BOT_PIECE to play
+    :return: (keys, mirrored): uint64 array of the keys and bool array, True where the key is the one
+        of the mirrored board (see Position.key3_mirrored), so that data stored under it has to be mirrored back
+    """
+    forward, reverse = board_keys(boards)
+    mirrored = reverse < forward
+    return np.where(mirrored, reverse, forward) // np.uint64(3), mirrored
+
+def board_key3(board_arr):
+    """
+    :param board_arr: Numpy array representation of board, param.BOT_PIECE to play
+    :return: (key, mirrored) of a single board, see board_keys3.
+        key is None if the board has more than MAX_KEY3_MOVES moves (no reliable key)
+    """
+    # A single board is faster with the solver bitboards than with NumPy
+    position = Position(board_arr)
+    if position.nb_moves() > MAX_KEY3_MOVES:
+        return None, False
+    return position.key3(), position.key3_mirrored()
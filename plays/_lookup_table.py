@@ -0,0 +1,205 @@
+import json
+import mmap
+import os
+import re
+
+import numpy as np
+
+from connect4_alg import Position, Solver
+from ._keys import MAX_KEY3_MOVES, board_key3, board_keys3
+
+# File layout: header, then `count` sorted uint64 key3 position keys, then `count` x WIDTH int8 scores
+MAGIC = b"C4LT"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S4"), ("version", "<u4"), ("width", "<u4"), ("height", "<u4"), ("count", "<u8")])
+KEY_DTYPE = np.dtype("<u8")
+INVALID_SCORE = np.iinfo(np.int8).min # Solver.INVALID_MOVE does not fit in an int8
+# (key, scores) record of the append-only files written during generation (see write_records)
+RECORD_DTYPE = np.dtype([("key", KEY_DTYPE), ("scores", np.int8, (Position.WIDTH,))])
+
+class LookupTable:
+    """
+    Read-only table of position scores stored in a binary file and opened with numpy.memmap.
+
+    Opening a table does not read it: pages are loaded on demand by the OS and shared through
+    the page cache by every process that opens the same file, whatever the size of the table.
+    Positions are stored once per symmetry under their key3 (see connect4_alg.Position.key3),
+    with the scores of every column for param.BOT_PIECE to play.
+
+    Parameters
+    ----------
+
+    table_file : str
+        Binary table written by LookupTable.write
+    """
+    def __init__(self, table_file: str):
+        self.table_file = table_file
+
+        header = np.fromfile(table_file, dtype=HEADER_DTYPE, count=1)
+        if len(header) != 1 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{table_file} is not a lookup table file")
+        if header["version"][0] != VERSION or header["width"][0] != Position.WIDTH or header["height"][0] != Position.HEIGHT:
+            raise ValueError(f"{table_file} has an unsupported version or board size")
+
+        count = int(header["count"][0])
+        if count == 0:
+            self._keys = np.zeros(0, dtype=KEY_DTYPE)
+            self._scores = np.zeros((0, Position.WIDTH), dtype=np.int8)
+            return
+
+        self._keys = np.memmap(table_file, dtype=KEY_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+        self._scores = np.memmap(table_file, dtype=np.int8, mode="r", offset=HEADER_DTYPE.itemsize + count * KEY_DTYPE.itemsize,
+                                 shape=(count, Position.WIDTH))
+
+    # Only the file name is pickled (e.g. when sent to another process), the table is mapped again on the other side
+    def __getstate__(self):
+        return {"table_file": self.table_file}
+
+    def __setstate__(self, state):
+        self.__init__(state["table_file"])
+
+    def __len__(self):
+        return len(self._keys)
+
+    def entries(self):
+        """
+        :return: (keys, scores) arrays of the table, with scores in the file encoding (see encode_scores)
+        """
+        return np.asarray(self._keys), np.asarray(self._scores)
+
+    def prefetch(self):
+        """
+        Read one key per page, so that the keys searched by every lookup are in the page cache
+        """
+        step = max(1, mmap.PAGESIZE // KEY_DTYPE.itemsize)
+        int(self._keys[::step].sum())
+
+    def get(self, board_arr):
+        """
+        :param board_arr: Numpy array representation of board, param.BOT_PIECE to play
+        :return: List of scores for each column, or None if the position (and its mirror) is not stored
+        """
+        key, mirrored = board_key3(board_arr)
+        if key is None:
+            return None
+        key = np.uint64(key) # a Python int would be compared as a float64, inexact above 2^53
+        i = np.searchsorted(self._keys, key)
+        if i == len(self._keys) or self._keys[i] != key:
+            return None
+
+        scores = self._scores[i]
+        if mirrored:
+            scores = scores[::-1]
+        return [Solver.INVALID_MOVE if score == INVALID_SCORE else int(score) for score in scores]
+
+    @staticmethod
+    def write(table_file, keys, scores):
+        """
+        Write a binary table. Duplicated keys are only stored once.
+
+        :param table_file: Path of the file to (over)write
+        :param keys: Sequence of key3 position keys (see board_keys3), of positions with at most MAX_KEY3_MOVES moves
+        :param scores: N x WIDTH scores of the positions, in the orientation of their key3
+            (mirrored if Position.key3_mirrored), with Solver.INVALID_MOVE for full columns
+        """
+        keys = np.asarray(keys, dtype=KEY_DTYPE)
+        scores = encode_scores(scores).reshape(len(keys), Position.WIDTH)
+        keys, unique_indices = np.unique(keys, return_index=True) # sorted
+        scores = scores[unique_indices]
+
+        header = np.array([(MAGIC, VERSION, Position.WIDTH, Position.HEIGHT, len(keys))], dtype=HEADER_DTYPE)
+        with open(table_file, "wb") as f:
+            header.tofile(f)
+            keys.tofile(f)
+            scores.tofile(f)
+
+    @staticmethod
+    def merge(table_file, record_files):
+        """
+        Write a binary table from the records of one or more files written by write_records
+        """
+        records = np.concatenate([read_records(record_file) for record_file in record_files] or [np.zeros(0, RECORD_DTYPE)])
+        LookupTable.write(table_file, records["key"], records["scores"])
+        return len(records)
+
+def encode_scores(scores):
+    """
+    :param scores: Array-like of scores with Solver.INVALID_MOVE for full columns
+    :return: int8 numpy array of the scores as stored in a table file
+    """
+    scores = np.asarray(scores)
+    return np.where(scores == Solver.INVALID_MOVE, INVALID_SCORE, scores).astype(np.int8)
+
+def write_records(f, keys, scores):
+    """
+    Append (key, scores) records to a binary file opened in "ab" mode
+
+    :param keys: Sequence of key3 position keys
+    :param scores: N x WIDTH scores of the positions, in the orientation of their key3
+    """
+    records = np.empty(len(keys), dtype=RECORD_DTYPE)
+    records["key"] = keys
+    records["scores"] = encode_scores(scores).reshape(len(keys), Position.WIDTH)
+    records.tofile(f)
+    f.flush()
+
+def read_records(record_file):
+    """
+    :return: Numpy array of the complete records of a file written by write_records
+        (a record cut by an interrupted write is ignored)
+    """
+    count = os.path.getsize(record_file) // RECORD_DTYPE.itemsize
+    return np.fromfile(record_file, dtype=RECORD_DTYPE, count=count)
+
+def key2board(key):
+    """
+    :param key: String representation of a board array (see plays.board2key)
+    :return: Numpy array representation of the board
+    """
+    cells = [int(cell) for cell in re.findall(r"-?\d", key)]
+    return np.array(cells, dtype=np.int8).reshape(Position.HEIGHT, Position.WIDTH)
+
+def oriented_entries(boards, scores):
+    """
+    :param boards: N x 6 x 7 array of board arrays, param.BOT_PIECE to play
+    :param scores: N x WIDTH scores of the boards
+    :return: (keys, scores) to be stored by LookupTable.write: key3 of the boards with at most
+        MAX_KEY3_MOVES moves and their scores in the orientation of the key
+    """
+    boards = np.asarray(boards).reshape(-1, Position.HEIGHT, Position.WIDTH)
+    scores = np.asarray(scores).reshape(-1, Position.WIDTH)
+    keys, mirrored = board_keys3(boards)
+    scores = np.where(mirrored[:, None], scores[:, ::-1], scores)
+    valid = np.count_nonzero(boards, axis=(1, 2)) <= MAX_KEY3_MOVES
+    return keys[valid], scores[valid]
+
+def read_json_table(json_file):
+    """
+    :return: (keys, scores) of a JSON lookup table (board key -> scores), see oriented_entries
+    """
+    with open(json_file, "r") as f:
+        saved_moves = json.load(f)
+
+    boards = np.array([key2board(key) for key in saved_moves], dtype=np.int8).reshape(-1, Position.HEIGHT, Position.WIDTH)
+    return oriented_entries(boards, list(saved_moves.values()))
+
+def json2table(json_file, table_file):
+    """
+    Convert a JSON lookup table (board key -> scores) into a binary LookupTable file
+    """
+    keys, scores = read_json_table(json_file)
+    LookupTable.write(table_file, keys, scores)
+    return len(keys)
+
+def load_lookup_table(name):
+    """
+    :param name: Path of the table without extension
+    :return: LookupTable of `name`.bin if it exists, else a dictionary of board_key3 keys to scores
+        read from `name`.json if it exists, else an empty dictionary
+    """
+    if os.path.isfile(name + ".bin"):
+        return LookupTable(name + ".bin")
+    if os.path.isfile(name + ".json"):
+        keys, scores = read_json_table(name + ".json")
+        return dict(zip(keys.tolist(), scores.tolist()))
+    return dict()
@@ -1,6 +1,5 @@
 import modules.board_param as param
-from game_board import Board
-from copy import deepcopy
+from game_board import Board, BitBoard
 
 import numpy as np
 import random
@@ -18,6 +17,9 @@ def mcs_play(board: Board, n_iterations):
     @param n_iterations:
         number of simulations run
     """
+    # Rollouts only drop pieces and check wins: much faster on bitboards
+    board = BitBoard(board.board_array)
+
     # If there's only one move possible, return that
     if len(board.get_valid_locations()) == 1:
         return board.get_valid_locations()[0]
@@ -25,41 +27,44 @@ def mcs_play(board: Board, n_iterations):
 
     @dataclass  
     class Node():
-        board: Board
         col: int
         wins: int = field(default=0, init=False)
         n_visits: int = field(default=0, init=False)
     
     child_nodes: List[Node] = []
     for col in board.get_valid_locations():
-        new_board = deepcopy(board)
-        new_board.drop_piece(col, param.BOT_PIECE)
+        board.push(col, param.BOT_PIECE)
         # If immediate win
-        if new_board.winning_move(param.BOT_PIECE):
+        if board.winning_move(param.BOT_PIECE):
             return col
-        node = Node(new_board, col)
+        board.pop()
+        node = Node(col)
         child_nodes.append(node)
 
 
     for _ in range(n_iterations):
         chosen_node = random.choice(child_nodes)
 
-        # Simulate / Rollout
+        # Simulate / Rollout, in place: every move is undone afterwards
         pieces = cycle([param.PLAYER_PIECE, param.BOT_PIECE])
-        sim_board = deepcopy(chosen_node.board)
+        board.push(chosen_node.col, param.BOT_PIECE)
+        n_moves = 1
         for piece in pieces:
-            col = random.choice(sim_board.get_valid_locations())
-            sim_board.drop_piece(col, piece)
-            if sim_board.winning_move(piece):
+            col = random.choice(board.get_valid_locations())
+            board.push(col, piece)
+            n_moves += 1
+            if board.winning_move(piece):
                 if piece == param.BOT_PIECE:
                     result = 1
                 else:
                     result = -10
                 break
-            if not sim_board.get_valid_locations(): # Draw
+            if not board.get_valid_locations(): # Draw
                 result = 0
                 break
-        
+        for _ in range(n_moves):
+            board.pop()
+
         chosen_node.n_visits += 1
         chosen_node.wins += result
 
@@ -2,10 +2,9 @@ import random
 import math
 from typing import List
 from itertools import cycle
-from copy import deepcopy
 
 import modules.board_param as param
-from game_board import Board
+from game_board import Board, BitBoard
 
 class MCTSNode:
     """
@@ -128,7 +127,7 @@ class MCTS_Tree:
 
         children = []
         for col in playable_cols:
-            new_board = deepcopy(board)
+            new_board = board.clone()
             new_board.play_turn(col, node.piece, display_board=False)
 
             child = MCTSNode(new_board, node.opponent_piece, node, col)
@@ -158,16 +157,23 @@ class MCTS_Tree:
             return node.opponent_piece
 
             
+        # Played in place on the node's board, every move is undone before returning
         pieces = cycle([node.piece, node.opponent_piece])
-        sim_board = deepcopy(node.board)
-        for piece in pieces:
-            if not sim_board.get_valid_locations(): # Draw
-                return param.EMPTY
-            
-            col = random.choice(sim_board.get_valid_locations())
-            sim_board.drop_piece(col, piece)
-            if sim_board.winning_move(piece):
-                return piece
+        sim_board = node.board
+        n_moves = 0
+        try:
+            for piece in pieces:
+                if not sim_board.get_valid_locations(): # Draw
+                    return param.EMPTY
+
+                col = random.choice(sim_board.get_valid_locations())
+                sim_board.push(col, piece)
+                n_moves += 1
+                if sim_board.winning_move(piece):
+                    return piece
+        finally:
+            for _ in range(n_moves):
+                sim_board.pop()
             
     def backpropagate(self, node: MCTSNode, winner: int):
         while node:
@@ -181,7 +187,8 @@ class MCTS_Tree:
 
 def mcts_play(board, n_iterations, c):
 
-    root = MCTSNode(board, param.BOT_PIECE)
+    # Rollouts only drop pieces and check wins: much faster on bitboards
+    root = MCTSNode(BitBoard(board.board_array), param.BOT_PIECE)
     tree = MCTS_Tree(root, c)
     for _ in range(n_iterations):
         node = tree.select()
@@ -0,0 +1,99 @@
+import threading
+
+import numpy as np
+
+from connect4_alg import Position
+import modules.board_param as param
+
+from .plays import cached_board_scores, lookup_board_scores, store_board_scores
+from ._solver_pool import SolverPool, load_solver_config, solver_pool
+
+# Columns in the solver exploration order: the center replies are the most likely ones
+PONDER_ORDER = sorted(range(param.COLUMN_COUNT), key=lambda col: abs(2 * col - (param.COLUMN_COUNT - 1)))
+
+class Ponderer:
+    """
+    Background analysis of the positions after each reply of the human, while the human is thinking.
+
+    Scores are stored with the other solver results (see plays.cached_board_scores), so the bot's answer to the
+    actual reply is usually an instant cache hit. The analysis runs in slices of `time_slice` seconds on a solver
+    borrowed from the pool (the transposition table keeps the progress between slices), so stop() returns
+    within one slice when the real move arrives.
+
+    Parameters
+    ----------
+
+    pool : SolverPool
+        Pool the pondering solver is borrowed from, for as long as the ponder runs
+
+    time_slice : float
+        Maximum time in seconds between two checks for a stop request
+
+    enabled : bool
+        start() does nothing if False
+    """
+    def __init__(self, pool: SolverPool = solver_pool, time_slice: float = 0.05, enabled: bool = True):
+        self.pool = pool
+        self.time_slice = time_slice
+        self.enabled = enabled
+        self.n_solved = 0 # replies analyzed by the ponder since creation
+
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.RLock() # start and stop may be called by different request threads
+
+    def start(self, board_arr, saved_moves=None):
+        """
+        Start analyzing the replies of the human in the background, a running ponder is stopped first
+
+        :param board_arr: Numpy array representation of board, param.PLAYER_PIECE to play
+        :param saved_moves: Lookup table of the game, positions found in it are skipped
+        """
+        with self._lock:
+            self.stop()
+            if not self.enabled:
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(np.array(board_arr, dtype=np.int8), saved_moves, self._stop),
+                                            daemon=True, name="ponder")
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the running ponder and wait until its solver is handed back to the pool
+        """
+        with self._lock:
+            self._stop.set()
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, board_arr, saved_moves, stop):
+        position = Position(board_arr, param.PLAYER_PIECE)
+        with self.pool.acquire() as solver:
+            for col in PONDER_ORDER:
+                if stop.is_set():
+                    return
+                # Nothing to analyze after a full column or a winning reply
+                if not position.can_play(col) or position.is_winning_move(col):
+                    continue
+
+                reply = board_arr.copy()
+                reply[np.count_nonzero(reply[:, col]), col] = param.PLAYER_PIECE
+                if lookup_board_scores(reply, saved_moves if saved_moves is not None else {}) is not None \
+                        or cached_board_scores(reply) is not None:
+                    continue
+
+                reply_position = Position(reply)
+                while not stop.is_set():
+                    analysis = solver.analyze_bounded(reply_position, self.time_slice)
+                    if analysis.complete:
+                        store_board_scores(reply, analysis.lower)
+                        self.n_solved += 1
+                        break
+
+# Default ponderer of the process, enabled with PONDER in config/solver.yaml
+ponderer = Ponderer(enabled=load_solver_config().PONDER)
@@ -0,0 +1,130 @@
+import os
+import threading
+
+import numpy as np
+
+from ._keys import board_key3
+from ._lookup_table import RECORD_DTYPE, INVALID_SCORE, LookupTable, read_records, write_records
+from ._solver_pool import load_solver_config
+from connect4_alg import Solver
+
+class PositionLog:
+    """
+    Persistent cache of the positions solved live, shared by every process of the kiosk.
+
+    Solved positions are appended as (key3, scores) records (see write_records) to an append-only file,
+    indexed in memory by key3 on the first get or put. Records appended by other processes are read
+    when a position is not found, so every process benefits from the positions solved by the others.
+    The log can be merged into a binary lookup table with merge_into.
+
+    Parameters
+    ----------
+
+    log_file : str
+        Append-only file of the records, created on the first write
+    """
+    def __init__(self, log_file: str):
+        self.log_file = log_file
+        self._index = {} # key3 -> scores in the orientation of the key
+        self._offset = 0 # size of the part of the file already indexed
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Index the records appended since the last call (by any process)
+        """
+        with self._lock:
+            size = os.path.getsize(self.log_file) if os.path.isfile(self.log_file) else 0
+            if size < self._offset + RECORD_DTYPE.itemsize:
+                return
+            with open(self.log_file, "rb") as f:
+                f.seek(self._offset)
+                records = np.fromfile(f, dtype=RECORD_DTYPE, count=(size - self._offset) // RECORD_DTYPE.itemsize)
+            self._offset += len(records) * RECORD_DTYPE.itemsize
+            for key, scores in zip(records["key"].tolist(), records["scores"].tolist()):
+                self._index[key] = [Solver.INVALID_MOVE if score == INVALID_SCORE else score for score in scores]
+
+    def get(self, board_arr):
+        """
+        :param board_arr: Numpy array representation of board, param.BOT_PIECE to play
+        :return: List of scores for each column, or None if the board (and its mirror) was never logged
+        """
+        key, mirrored = board_key3(board_arr)
+        if key is None:
+            return None
+        if key not in self._index:
+            self.refresh()
+        scores = self._index.get(key)
+        if scores is None:
+            return None
+        return scores[::-1] if mirrored else list(scores)
+
+    def put(self, board_arr, scores):
+        """
+        Append the exact scores of a board to the log (once per position)
+        """
+        key, mirrored = board_key3(board_arr)
+        if key is None:
+            return
+        if key not in self._index:
+            self.refresh() # it may have been logged by another process
+        if key in self._index:
+            return
+        scores = scores[::-1] if mirrored else list(scores)
+        with self._lock:
+            with open(self.log_file, "ab") as f:
+                end = f.tell()
+                if end % RECORD_DTYPE.itemsize:
+                    f.truncate(end - end % RECORD_DTYPE.itemsize) # drop a record cut by a crash, it would shift the next ones
+                write_records(f, [key], [scores])
+            self._index[key] = scores
+
+    def __len__(self):
+        return len(self._index)
+
+    def merge_into(self, table_file):
+        """
+        Write the binary lookup table `table_file` with its current entries (if it exists) and the logged positions.
+        Entries of the table are kept when a position is in both.
+        """
+        records = [read_records(self.log_file)] if os.path.isfile(self.log_file) else []
+        if os.path.isfile(table_file):
+            table = LookupTable(table_file)
+            table_records = np.empty(len(table), dtype=RECORD_DTYPE)
+            table_records["key"], table_records["scores"] = table.entries()
+            records.insert(0, table_records) # LookupTable.write keeps the first occurrence of a key
+        records = np.concatenate(records or [np.zeros(0, RECORD_DTYPE)])
+
+        LookupTable.write(table_file + ".tmp", records["key"], records["scores"])
+        os.replace(table_file + ".tmp", table_file) # processes that mapped the old table keep reading it
+        return len(records)
+
+# Relative POSITION_LOG paths are relative to the repository root, whatever the working directory
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def position_log_file(config=None):
+    """
+    :param config: Solver settings (see load_solver_config), config/solver.yaml if None
+    :return: Absolute path of the POSITION_LOG file, None if the log is disabled
+    """
+    log_file = (config or load_solver_config()).POSITION_LOG
+    return os.path.join(_ROOT_DIR, log_file) if log_file else None
+
+_default_log = None
+_default_log_opened = False
+_default_log_lock = threading.Lock()
+
+def get_position_log():
+    """
+    Default log of the process, written through by plays after every exact analysis.
+    Opened on the first call, so importing plays reads neither the configuration nor the log file.
+
+    :return: PositionLog of POSITION_LOG in config/solver.yaml, None if it is disabled
+    """
+    global _default_log, _default_log_opened
+    with _default_log_lock:
+        if not _default_log_opened:
+            log_file = position_log_file()
+            _default_log = PositionLog(log_file) if log_file else None
+            _default_log_opened = True
+    return _default_log
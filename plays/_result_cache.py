@@ -0,0 +1,77 @@
+import threading
+from collections import OrderedDict
+
+from ._keys import board_key3
+from ._solver_pool import load_solver_config
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of solver results, shared by every analysis of a process.
+
+    Results are stored once per symmetry under their board_key3, in the orientation of the key,
+    so a board and its mirror share their entry. Exact and weak results are stored separately.
+
+    Parameters
+    ----------
+
+    max_entries : int
+        Maximum number of cached results, the least recently used one is evicted beyond it (0 disables the cache)
+    """
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, board_arr, weak=False):
+        """
+        :param board_arr: Numpy array representation of board, param.BOT_PIECE to play
+        :param weak: Look for a weak (win/draw/loss) result instead of exact scores
+        :return: List of scores for each column, or None if the board (and its mirror) is not cached
+        """
+        key, mirrored = board_key3(board_arr)
+        with self._lock:
+            scores = self._entries.get((key, weak)) if key is not None else None
+            if scores is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((key, weak))
+            self.hits += 1
+        return scores[::-1] if mirrored else list(scores)
+
+    def put(self, board_arr, scores, weak=False):
+        """
+        :param board_arr: Numpy array representation of board, param.BOT_PIECE to play
+        :param scores: List of scores for each column of the board
+        :param weak: True if `scores` come from a weak solve
+        """
+        key, mirrored = board_key3(board_arr)
+        if key is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(key, weak)] = scores[::-1] if mirrored else list(scores)
+            self._entries.move_to_end((key, weak))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        :return: Dictionary of the number of entries and of the hit/miss/eviction counters
+        """
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __len__(self):
+        return len(self._entries)
+
+# Default cache of the process, in front of every solver analysis of plays
+result_cache = ResultCache(load_solver_config().RESULT_CACHE_SIZE)
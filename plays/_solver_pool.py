@@ -0,0 +1,157 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import yaml
+
+from connect4_alg import Solver, SolverSession
+from modules.utils import dotdict
+
+SOLVER_CONFIG_FILE = "config/solver.yaml"
+DEFAULT_SOLVER_CONFIG = {
+    "TABLE_SIZE": Solver.DEFAULT_TABLE_SIZE,
+    "MAX_SOLVERS": 1,
+    "RESET_AFTER": None,
+    "BOOK_FILE": "7x6.book", # built with connect4_alg/build_book.py
+    "MAX_THINK_TIME": None,
+    "THREADS": 1,
+    "RESULT_CACHE_SIZE": 100000, # solver results kept by plays.ResultCache (about 200 bytes each)
+    "POSITION_LOG": None, # append-only file of the positions solved live (see plays.PositionLog), None to disable
+    "PONDER": False, # analyze the replies of the human during their turn (see plays.Ponderer)
+    "WEAK": False, # lookup table generation only: store win/draw/loss outcomes instead of exact scores
+}
+
+def load_solver_config(config_file=SOLVER_CONFIG_FILE):
+    """
+    :param config_file: YAML file overriding (part of) DEFAULT_SOLVER_CONFIG
+    :return: dotdict of the solver settings, defaults are used if the file is missing
+    """
+    config = dotdict(DEFAULT_SOLVER_CONFIG)
+    if os.path.isfile(config_file):
+        with open(config_file, "r") as f:
+            config.update(yaml.safe_load(f) or {})
+    return config
+
+class SolverPool:
+    """
+    Pool of warm connect4_alg.Solver instances shared by every analysis in a process.
+
+    Building a Solver allocates and clears a large transposition table, so solvers are
+    created lazily (at most `max_solvers` of them) and handed back to the pool after use.
+    A solver is only ever used by one thread at a time.
+
+    Parameters
+    ----------
+
+    max_solvers : int
+        Maximum number of solvers kept by the pool. Callers block when all are in use
+
+    reset_after : int | None
+        Clear a solver's transposition table after this many analyses. None keeps the table
+        forever (stored entries are exact bounds, so they stay valid for any later position)
+
+    book_file : str | None
+        Opening book loaded into every new solver if the file exists
+
+    table_size : int
+        Base 2 log of the number of transposition table entries of each solver (5 bytes per entry)
+
+    max_think_time : float | None
+        Time budget in seconds of the optimal bot for positions that have to be solved, None for no limit
+
+    n_threads : int
+        Number of threads a single analysis spreads the columns across. Every extra thread
+        keeps its own transposition table of `table_size`
+    """
+    def __init__(self, max_solvers: int = 1, reset_after: int | None = None, book_file: str | None = None,
+                 table_size: int = Solver.DEFAULT_TABLE_SIZE, max_think_time: float | None = None, n_threads: int = 1):
+        if not Solver.MIN_TABLE_SIZE <= table_size <= Solver.MAX_TABLE_SIZE:
+            raise ValueError(f"table_size must be between {Solver.MIN_TABLE_SIZE} and {Solver.MAX_TABLE_SIZE}")
+
+        self.max_solvers = max_solvers
+        self.reset_after = reset_after
+        self.book_file = book_file
+        self.table_size = table_size
+        self.max_think_time = max_think_time
+        self.n_threads = n_threads
+
+        self._idle = queue.LifoQueue() # LIFO so that the warmest solver is reused first
+        self._lock = threading.Lock()
+        self._n_created = 0
+        self._generation = 0
+
+    @classmethod
+    def from_config(cls, config_file=SOLVER_CONFIG_FILE):
+        """
+        Build a pool from a solver configuration file (see config/solver.yaml)
+        """
+        config = load_solver_config(config_file)
+        return cls(max_solvers=config.MAX_SOLVERS, reset_after=config.RESET_AFTER,
+                   book_file=config.BOOK_FILE, table_size=config.TABLE_SIZE, max_think_time=config.MAX_THINK_TIME,
+                   n_threads=config.THREADS)
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle.empty() and self._n_created < self.max_solvers:
+                self._n_created += 1
+                return [self._new_solver(), 0, self._generation]
+
+        return self._idle.get()
+
+    def _new_solver(self):
+        solver = Solver(self.table_size)
+        if self.book_file is not None and os.path.isfile(self.book_file):
+            solver.load_book(self.book_file)
+        return solver
+
+    @contextmanager
+    def acquire(self):
+        """
+        Borrow a solver for the duration of a `with` block
+
+        :return:
+            connect4_alg.Solver reserved for the calling thread
+        """
+        entry = self._checkout()
+        solver, n_uses, generation = entry
+
+        # Apply the reset policy before handing the solver out
+        if generation != self._generation or (self.reset_after is not None and n_uses >= self.reset_after):
+            solver.reset()
+            entry[1] = 0
+            entry[2] = self._generation
+
+        try:
+            yield solver
+        finally:
+            entry[1] += 1
+            self._idle.put(entry)
+
+    def new_session(self):
+        """
+        Create a game-long SolverSession with the pool's table size and opening book.
+        The session is owned by the caller (one per game) and is not returned to the pool.
+        """
+        session = SolverSession(self.table_size)
+        if self.book_file is not None and os.path.isfile(self.book_file):
+            session.load_book(self.book_file)
+        return session
+
+    def warm_up(self):
+        """
+        Create a solver (and load the opening book) ahead of the first analysis
+        """
+        with self.acquire():
+            pass
+
+    def reset(self):
+        """
+        Clear the transposition tables of all solvers. Solvers are reset lazily
+        the next time they are acquired, so this never blocks on a running search.
+        """
+        with self._lock:
+            self._generation += 1
+
+# Default pool of the process, used by every call site that needs a solver
+solver_pool = SolverPool.from_config()
@@ -0,0 +1,75 @@
+import os
+import threading
+
+from ._lookup_table import LookupTable, json2table
+
+class LookupTableService:
+    """
+    Lookup table loaded once per server in a background thread, and attached read-only by every game.
+
+    The table is always served as a memory-mapped LookupTable. A JSON table is converted once to a binary
+    file next to it (again when the JSON file is newer), so the table is never parsed at game start.
+    A LookupTable pickles as its file name: processes started with it map the same file and share its
+    pages through the page cache instead of receiving a copy.
+
+    Parameters
+    ----------
+
+    name : str
+        Path of the table without extension (`name`.bin, or `name`.json to convert)
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.ready = threading.Event() # set when loading is over, successful or not
+        self.error = None
+
+        self._table = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start loading the table in the background (only the first call does)
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name="lookup-table-loader", daemon=True)
+                self._thread.start()
+        return self
+
+    def _load(self):
+        table_file, json_file = self.name + ".bin", self.name + ".json"
+        try:
+            if os.path.isfile(json_file) and (not os.path.isfile(table_file) or os.path.getmtime(table_file) < os.path.getmtime(json_file)):
+                json2table(json_file, table_file + ".tmp")
+                os.replace(table_file + ".tmp", table_file) # readers never see a partial table
+            if os.path.isfile(table_file):
+                table = LookupTable(table_file)
+                table.prefetch()
+                self._table = table
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ready.set()
+
+    def table(self, timeout=0):
+        """
+        :param timeout: Seconds to wait for the table to be ready (None: until it is)
+        :return: The LookupTable, or an empty dictionary if it is not ready yet (or there is no table)
+        """
+        if timeout != 0:
+            self.ready.wait(timeout)
+        if self.ready.is_set() and self._table is not None:
+            return self._table
+        return dict()
+
+    def status(self):
+        """
+        :return: Dictionary of the readiness of the table, its number of entries and the loading error if any
+        """
+        ready = self.ready.is_set()
+        return {
+            "ready": ready,
+            "entries": len(self._table) if ready and self._table is not None else 0,
+            "error": str(self.error) if self.error is not None else None,
+        }
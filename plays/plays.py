@@ -1,12 +1,26 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
 from ._mcs import mcs_play
 from ._mcts import mcts_play
-from connect4_alg import Position, Solver
+from ._keys import board_key3
+from ._lookup_table import LookupTable
+from ._result_cache import result_cache
+from ._position_log import get_position_log
+from ._solver_pool import SolverPool, solver_pool
+from connect4_alg import Position, Solver, SolverSession
 
 import modules.board_param as param
 from game_board import Board
 
+logger = logging.getLogger(__name__)
+
 def board2key(board_arr):
     """
+    Key of the JSON lookup tables. Tables are keyed by board_key3 once loaded (see load_lookup_table)
+
     :param board_arr:
         Numpy array representation of board array
     :return:
@@ -14,39 +28,229 @@ def board2key(board_arr):
     """
     return "".join(map(str, board_arr.flatten()))
 
-def calculate_board_scores(board_arr, saved_moves=None):
+def calculate_board_scores(board_arr, saved_moves=None, session: SolverSession | None = None, time_limit=None):
     """
     Helper function to calculate scores for a board position.
-    First checks lookup table, then falls back to computation if needed.
+    First checks lookup table, the result cache and the position log, then falls back to computation if needed.
+    Computed scores are written through to the result cache and the position log.
 
     :param board_arr: Numpy array representation of board
-    :param saved_moves: Dictionary of board positions to scores (lookup table)
-    :return: List of scores for each column
+    :param saved_moves: Lookup table: LookupTable or dictionary of board_key3 keys to scores (read-only)
+    :param session: SolverSession of the current game, its warm table is used instead of a pooled solver
+    :param time_limit: Maximum solve time in seconds if the board has to be solved, None for no limit
+    :return: List of scores for each column, None if they could not be computed within `time_limit`
     """
     if saved_moves is None:
         saved_moves = {}
 
-    key = board2key(board_arr)
+    scores = lookup_board_scores(board_arr, saved_moves)
+    if scores is not None:
+        return scores
 
-    # First try direct lookup
-    if key in saved_moves:
-        return saved_moves[key]
-
-    # Try flipped board lookup
-    flipped_key = board2key(board_arr[:, ::-1])
-    if flipped_key in saved_moves:
-        return saved_moves[flipped_key][::-1]
+    scores = cached_board_scores(board_arr)
+    if scores is not None:
+        return scores
 
     # If not in lookup table, compute using algorithm
-    position = Position(board_arr)
-    solver = Solver()
-    scores = solver.analyze(position, False)
+    scores = _solver_analyze(board_arr, False, session, time_limit)
+    if scores is not None:
+        store_board_scores(board_arr, scores)
+
+    return scores
 
-    # Cache the result
-    saved_moves[key] = scores
+def calculate_board_outcomes(board_arr, saved_moves=None, session: SolverSession | None = None, time_limit=None):
+    """
+    Cheaper version of calculate_board_scores when only the outcome of each move matters.
+    Positions outside of the lookup table are analyzed with a weak (win/draw/loss) solve.
 
+    :param board_arr: Numpy array representation of board
+    :param saved_moves: Lookup table (LookupTable or dictionary of board_key3 keys to scores), exact or weak
+    :param session: SolverSession of the current game, its warm table is used instead of a pooled solver
+    :param time_limit: Maximum solve time in seconds if the board has to be solved, None for no limit
+    :return: List of outcomes for each column: 1 (win), 0 (draw), -1 (loss) or Solver.INVALID_MOVE,
+        None if they could not be computed within `time_limit`
+    """
+    scores = lookup_board_scores(board_arr, saved_moves if saved_moves is not None else {})
+    if scores is None:
+        scores = cached_board_scores(board_arr)
+    if scores is None:
+        scores = result_cache.get(board_arr, weak=True)
+    if scores is None:
+        scores = _solver_analyze(board_arr, True, session, time_limit)
+        if scores is None:
+            return None
+        result_cache.put(board_arr, scores, weak=True)
+    return scores2outcomes(scores)
+
+def board_outcome(board_arr, current_player=param.BOT_PIECE, saved_moves=None, time_limit=None):
+    """
+    :param board_arr: Numpy array representation of board, nobody has won yet
+    :param current_player: Piece of the player to move
+    :param saved_moves: Lookup table (LookupTable or dictionary of board_key3 keys to scores), checked before solving
+    :param time_limit: Maximum solve time in seconds for positions outside of `saved_moves` and the result cache
+        (Default: solver_pool.max_think_time, None for no limit)
+    :return: Outcome of the game with perfect play for `current_player`: 1 (win), 0 (draw) or -1 (loss),
+        None if it could not be proven within `time_limit`
+    """
+    if np.all(board_arr[param.ROW_COUNT - 1] != param.EMPTY):
+        return 0 # full board: nobody has won, so it is a draw
+
+    # Tables and caches are keyed for param.BOT_PIECE to play
+    player_board = board_arr * current_player * param.BOT_PIECE
+    scores = lookup_board_scores(player_board, saved_moves if saved_moves is not None else {})
+    if scores is None:
+        scores = cached_board_scores(player_board)
+    if scores is None:
+        scores = result_cache.get(player_board, weak=True)
+    if scores is not None:
+        return int(np.sign(max(score for score in scores if score != Solver.INVALID_MOVE)))
+
+    if time_limit is None:
+        time_limit = solver_pool.max_think_time
+    with solver_pool.acquire() as solver:
+        analysis = solver.analyze_bounded(Position(player_board), time_limit or 0, 0, True, solver_pool.n_threads)
+    # Full columns are INVALID_MOVE in both bounds
+    lower = max(score for score in analysis.lower if score != Solver.INVALID_MOVE)
+    upper = max(score for score in analysis.upper if score != Solver.INVALID_MOVE)
+    if lower > 0:
+        return 1
+    if upper < 0:
+        return -1
+    if lower == 0 and upper == 0:
+        return 0
+    return None
+
+def scores2outcomes(scores):
+    """
+    :param scores: List of exact or weak scores for each column
+    :return: List of outcomes for each column: 1 (win), 0 (draw), -1 (loss) or Solver.INVALID_MOVE
+    """
+    return [score if score == Solver.INVALID_MOVE else int(np.sign(score)) for score in scores]
+
+def cached_board_scores(board_arr):
+    """
+    :param board_arr: Numpy array representation of board
+    :return: Exact scores of the board already solved by this process (result cache)
+        or by any process (position log), None if it has never been solved
+    """
+    scores = result_cache.get(board_arr)
+    position_log = get_position_log()
+    if scores is None and position_log is not None:
+        scores = position_log.get(board_arr)
+        if scores is not None:
+            result_cache.put(board_arr, scores)
     return scores
 
+def store_board_scores(board_arr, scores):
+    """
+    Write exact scores through to the result cache and the position log (see cached_board_scores)
+    """
+    result_cache.put(board_arr, scores)
+    position_log = get_position_log()
+    if position_log is not None:
+        position_log.put(board_arr, scores)
+
+def _solver_analyze(board_arr, weak, session, time_limit=None):
+    # Scores of every column, None if `time_limit` ran out before they were all exact
+    position = Position(board_arr)
+    n_threads = solver_pool.n_threads
+    follows = session is not None and session.position().bitboards() == position.bitboards()
+    if time_limit:
+        if follows:
+            analysis = session.analyze_bounded(time_limit, 0, weak, n_threads)
+            stats = session.last_stats()
+        else:
+            with solver_pool.acquire() as solver:
+                analysis = solver.analyze_bounded(position, time_limit, 0, weak, n_threads)
+                stats = solver.last_stats()
+        scores = analysis.lower if analysis.complete else None
+    elif session is not None:
+        scores = session.analyze(weak, n_threads) if follows else session.analyze_position(position, weak, n_threads)
+        stats = session.last_stats()
+    else:
+        with solver_pool.acquire() as solver:
+            scores = solver.analyze(position, weak, n_threads)
+            stats = solver.last_stats()
+    log_search_stats(board_arr, stats)
+    return scores
+
+def lookup_board_scores(board_arr, saved_moves):
+    """
+    :param board_arr: Numpy array representation of board
+    :param saved_moves: Lookup table: LookupTable or dictionary of board_key3 keys to scores
+        (stored in the orientation of the key)
+    :return: List of scores for each column, or None if neither the board nor its mirror is stored
+    """
+    if isinstance(saved_moves, LookupTable):
+        return saved_moves.get(board_arr)
+
+    # The board and its mirror share their key
+    key, mirrored = board_key3(board_arr)
+    scores = saved_moves.get(key)
+    if scores is None:
+        return None
+    return scores[::-1] if mirrored else scores
+
+def best_move(board_arr, time_limit=None, session: SolverSession | None = None):
+    """
+    Best column for a position outside of the lookup table, without the exact score of every column
+    (see connect4_alg.Solver.best_move). Use calculate_board_scores when the scores are needed.
+
+    :param board_arr: Numpy array representation of board, param.BOT_PIECE to play
+    :param time_limit: Maximum think time in seconds, None for no limit.
+        When it runs out, the best column proven so far is returned
+    :param session: SolverSession of the current game, used if it follows this board
+    :return: Column to play
+    """
+    time_limit = time_limit or 0
+    position = Position(board_arr)
+    n_threads = solver_pool.n_threads
+    if session is not None and session.position().bitboards() == position.bitboards():
+        col = session.best_move(False, time_limit, 0, n_threads)
+        stats = session.last_stats()
+    else:
+        with solver_pool.acquire() as solver:
+            col = solver.best_move(position, False, time_limit, 0, n_threads)
+            stats = solver.last_stats()
+    log_search_stats(board_arr, stats)
+
+    return col
+
+def log_search_stats(board_arr, stats):
+    """
+    Log the cost of a solver search, to find the positions that are expensive to solve
+
+    :param board_arr: Numpy array representation of the searched board
+    :param stats: connect4_alg.SearchStats of the search
+    """
+    logger.info("Solved %s%s in %.3fs: %d nodes, table hits %d/%d (%.0f%%), book hits %d, depth %d",
+                board_key3(board_arr)[0], " (budget exhausted)" if stats.exhausted else "", stats.elapsed, stats.node_count,
+                stats.table_hits, stats.table_probes, 100 * stats.table_hit_rate, stats.book_hits, stats.max_depth)
+
+def analyze_many(boards, weak=False, n_workers=1, pool: SolverPool = solver_pool):
+    """
+    Score every column of a batch of boards in one call per worker.
+
+    :param boards: N x 6 x 7 numpy array (or sequence) of board arrays, param.BOT_PIECE to play
+    :param weak: Only compute win/draw/loss scores
+    :param n_workers: Number of threads the batch is split across. Each thread borrows
+        its own solver from `pool`, so the pool should allow at least `n_workers` solvers
+    :param pool: SolverPool the solvers are borrowed from
+    :return: N x 7 numpy array of scores (Solver.INVALID_MOVE for full columns)
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+
+    def analyze_chunk(chunk):
+        with pool.acquire() as solver:
+            return solver.analyze_many(chunk, weak)
+
+    if n_workers <= 1 or len(boards) <= 1:
+        return analyze_chunk(boards)
+
+    chunks = np.array_split(boards, min(n_workers, len(boards)))
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        return np.concatenate(list(executor.map(analyze_chunk, chunks)))
+
 def is_terminal_node(board: Board):
     return board.winning_move(param.PLAYER_PIECE) or board.winning_move(param.BOT_PIECE) or len(board.get_valid_locations()) == 0
 
@@ -62,10 +266,15 @@ def hard_play(board):
     col = mcts_play(board, 1000, 1.414)
     return col
 
-def optimal_play(board, saved_moves=None):
+def optimal_play(board, saved_moves=None, session: SolverSession | None = None, time_limit=None):
     """
     :param saved_moves:
-        Dictionary of board to scores
+        Lookup table: LookupTable or dictionary of board_key3 keys to scores
+    :param session:
+        SolverSession following the current game, if any
+    :param time_limit:
+        Maximum think time in seconds for positions outside of `saved_moves`
+        (Default: solver_pool.max_think_time, None for no limit)
     :param board:
         Board object
         Ensure that param.BOT_PIECE = 1 and param.PLAYER_PIECE = -1
@@ -76,8 +285,16 @@ def optimal_play(board, saved_moves=None):
     if saved_moves is None:
         saved_moves = {}
 
+    if time_limit is None:
+        time_limit = solver_pool.max_think_time
+
     board_arr = board.board_array
-    scores = calculate_board_scores(board_arr, saved_moves)
+    scores = lookup_board_scores(board_arr, saved_moves)
+    if scores is None:
+        scores = cached_board_scores(board_arr)
+    if scores is None:
+        # Only the best column is needed to play: skip the exact scores of the other ones
+        return best_move(board_arr, time_limit, session)
 
     print(scores) # TODO For debugging, remove later
     col = scores.index(max(scores))
@@ -21,6 +21,7 @@ from pydantic import BaseModel
 # Assuming these files exist in the project structure
 from camera import Camera
 from camera_grid import Grid
+from plays import LookupTableService
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,6 +36,9 @@ game_process = None
 # Global variables for feedback system
 move_messages = {}
 
+# Lookup table of the game processes, loaded once in the background at server start
+lookup_service = LookupTableService('lookup_table_till_move_10')
+
 def load_move_messages():
     """Load move evaluation messages from JSON file"""
     global move_messages
@@ -58,6 +62,7 @@ load_move_messages()
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting API server...")
+    lookup_service.start()
     with Manager() as manager:
         app.state.manager = manager
         app.state.shared_dict = manager.dict()
@@ -356,6 +361,11 @@ def make_move(move: MoveRequest, request: Request):
     logger.info("Bot move completed")
     return {"status": "ok"}
 
+@app.get("/lookup_table")
+def get_lookup_table_status():
+    """Readiness of the lookup table loaded at server start"""
+    return lookup_service.status()
+
 @app.get("/status")
 def get_status(request: Request):
     shared_dict = request.app.state.shared_dict
@@ -386,7 +396,9 @@ def new_game(option: StartGameRequest, request: Request):
         bot_first=(option.who_starts == 'bot'),
         no_camera=option.no_camera,
         no_motors=option.no_motors,
-        no_print=True
+        no_print=True,
+        # Attached read-only by the game process: a LookupTable is sent as its file name, not copied
+        lookup_table=lookup_service.table()
     )
 
     # Reset shared state for a new game
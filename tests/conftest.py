@@ -0,0 +1,14 @@
+import os
+import sys
+
+# Modules are imported from the repository root, like the scripts and servers do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture(autouse=True)
+def no_position_log(monkeypatch):
+    # Keep the tests away from the position log of the repository (see plays.get_position_log)
+    import plays._position_log
+    monkeypatch.setattr(plays._position_log, "_default_log", None)
+    monkeypatch.setattr(plays._position_log, "_default_log_opened", True)
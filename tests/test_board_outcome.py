@@ -0,0 +1,40 @@
+import random
+
+import numpy as np
+
+from connect4_alg import Position, Solver
+from plays import board_outcome
+import modules.board_param as param
+
+def game_without_alignment(n_moves, seed):
+    """
+    Board array and Position of a random game of `n_moves` moves where nobody makes an alignment,
+    the first player with param.BOT_PIECE
+    """
+    rng = random.Random(seed)
+    while True:
+        position = Position()
+        board_arr = np.zeros((param.ROW_COUNT, param.COLUMN_COUNT), dtype=np.int8)
+        piece = param.BOT_PIECE
+        for _ in range(n_moves):
+            cols = [col for col in range(Position.WIDTH) if position.can_play(col) and not position.is_winning_move(col)]
+            if not cols:
+                break
+            col = rng.choice(cols)
+            board_arr[np.count_nonzero(board_arr[:, col]), col] = piece
+            position.play_col(col)
+            piece = -piece
+        else:
+            return board_arr, position
+
+def test_full_board_is_a_draw():
+    full, _ = game_without_alignment(Position.WIDTH * Position.HEIGHT, 0)
+    assert board_outcome(full, param.PLAYER_PIECE) == 0
+    assert board_outcome(full, param.BOT_PIECE) == 0
+
+def test_outcome_with_full_columns():
+    for seed in range(5):
+        board_arr, position = game_without_alignment(36, seed)
+        # 36 moves: param.BOT_PIECE to play
+        expected = int(np.sign(Solver(20).solve(position, True)))
+        assert board_outcome(board_arr, param.BOT_PIECE, time_limit=5) == expected
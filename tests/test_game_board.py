@@ -0,0 +1,105 @@
+import random
+
+import numpy as np
+
+import modules.board_param as param
+from game_board import Board, BitBoard
+
+def random_games(n_games, seed):
+    # Boards after every move of random games, until a win or a full board
+    rng = random.Random(seed)
+    for _ in range(n_games):
+        board, bit_board = Board(), BitBoard()
+        piece = param.BOT_PIECE
+        while board.get_valid_locations():
+            col = rng.choice(board.get_valid_locations())
+            board.drop_piece(col, piece)
+            bit_board.drop_piece(col, piece)
+            yield board, bit_board, piece
+            if board.winning_move(piece):
+                break
+            piece = -piece
+
+def assert_line_of(board, cells, piece):
+    # cells are in the flipped rows of pretty_print_board
+    assert len(cells) == param.WINDOW_LENGTH
+    assert all(board.board_array[param.ROW_COUNT - 1 - row][col] == piece for row, col in cells)
+    steps = {(r2 - r1, c2 - c1) for (r1, c1), (r2, c2) in zip(cells, cells[1:])}
+    assert len(steps) == 1 and steps.pop() in ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, -1), (1, -1), (-1, 1))
+
+def test_board_and_bit_board_agree_on_wins():
+    for board, bit_board, piece in random_games(200, seed=0):
+        assert np.array_equal(board.board_array, bit_board.board_array)
+        assert board.last_play == bit_board.last_play
+        for p in (param.BOT_PIECE, param.PLAYER_PIECE):
+            won = board.winning_move(p)
+            assert won == bit_board.winning_move(p)
+            if won:
+                assert_line_of(board, board.winning_cells, p)
+                assert_line_of(board, bit_board.winning_cells, p)
+            else:
+                assert board.winning_cells == bit_board.winning_cells == []
+
+def test_direct_board_array_writes_after_a_scan():
+    board = Board()
+    assert not board.winning_move(param.BOT_PIECE)
+    board.board_array[0, :param.WINDOW_LENGTH] = param.BOT_PIECE
+    # The lines are cached once scanned: direct writes are not seen...
+    assert not board.winning_move(param.BOT_PIECE)
+    # ...but a new board rescans them
+    assert Board(board.board_array.copy()).winning_move(param.BOT_PIECE)
+    # A board built on an array is only scanned on the first win check
+    board_array = np.zeros((param.ROW_COUNT, param.COLUMN_COUNT), dtype=np.int8)
+    board = Board(board_array)
+    board_array[:param.WINDOW_LENGTH, 0] = param.PLAYER_PIECE
+    assert board.winning_move(param.PLAYER_PIECE)
+
+def test_clone_is_independent():
+    for board_class in (Board, BitBoard):
+        board = board_class()
+        for col in (3, 3, 2, 4):
+            board.push(col, param.BOT_PIECE)
+        assert not board.winning_move(param.BOT_PIECE)
+        clone = board.clone()
+        clone.push(5, param.BOT_PIECE)
+        assert clone.winning_move(param.BOT_PIECE)
+        assert not board.winning_move(param.BOT_PIECE)
+        assert board.board_array[0][5] == param.EMPTY
+        # Undoing a move of the original does not touch the clone
+        board.pop()
+        assert clone.board_array[0][4] == param.BOT_PIECE
+        clone.pop()
+        assert not clone.winning_move(param.BOT_PIECE)
+
+def test_push_pop_round_trip():
+    for board_class in (Board, BitBoard):
+        rng = random.Random(1)
+        board = board_class()
+        states = []
+        piece = param.BOT_PIECE
+        while board.get_valid_locations():
+            won = board.winning_move(piece)
+            states.append((board.board_array.copy(), board.last_play, won, board.winning_cells))
+            col = rng.choice(board.get_valid_locations())
+            board.push(col, piece)
+            piece = -piece
+        while states:
+            board_array, last_play, won, winning_cells = states.pop()
+            piece = -piece
+            board.pop()
+            assert np.array_equal(board.board_array, board_array)
+            assert board.last_play == last_play
+            assert board.winning_cells == winning_cells
+            assert board.winning_move(piece) == won
+
+def test_push_into_full_column_raises():
+    for board_class in (Board, BitBoard):
+        board = board_class()
+        for _ in range(param.ROW_COUNT):
+            board.push(0, param.BOT_PIECE)
+        try:
+            board.push(0, param.BOT_PIECE)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("push into a full column")
@@ -0,0 +1,74 @@
+import random
+
+import numpy as np
+
+from connect4_alg import Position, Solver
+from plays import LookupTable, board_key3
+from plays._keys import MAX_KEY3_MOVES
+from plays._lookup_table import oriented_entries
+
+def random_board(n_moves, rng):
+    """
+    Board array of a random game of `n_moves` moves without alignment, 1 to play (None if the game got stuck)
+    """
+    position = Position()
+    board_arr = np.zeros((Position.HEIGHT, Position.WIDTH), dtype=np.int8)
+    piece = 1
+    for _ in range(n_moves):
+        cols = [col for col in range(Position.WIDTH) if position.can_play(col) and not position.is_winning_move(col)]
+        if not cols:
+            return None
+        col = rng.choice(cols)
+        board_arr[np.count_nonzero(board_arr[:, col]), col] = piece
+        position.play_col(col)
+        piece = -piece
+    return board_arr * piece
+
+def children(board_arr):
+    """
+    Boards after each move of the player to play, the opponent to play (close key3 keys)
+    """
+    for col in range(Position.WIDTH):
+        height = np.count_nonzero(board_arr[:, col])
+        if height < Position.HEIGHT:
+            child = board_arr.copy()
+            child[height, col] = 1
+            yield -child
+
+def test_get_deep_sibling_positions(tmp_path):
+    rng = random.Random(0)
+    parents = [board for board in (random_board(rng.randint(27, MAX_KEY3_MOVES - 1), rng) for _ in range(500)) if board is not None]
+    boards = np.array([child for parent in parents for child in children(parent)])
+    scores = np.array([[rng.randint(-18, 18) for _ in range(Position.WIDTH)] for _ in boards])
+    scores[:, 0] = Solver.INVALID_MOVE
+    assert max(board_key3(board)[0] for board in boards) > 2 ** 53 # keys that a float64 cannot represent exactly
+
+    table_file = str(tmp_path / "deep.bin")
+    keys, oriented_scores = oriented_entries(boards, scores)
+    LookupTable.write(table_file, keys, oriented_scores)
+    table = LookupTable(table_file)
+    stored = dict(zip(keys.tolist(), oriented_scores.tolist())) # a position may come twice (mirrors)
+    for board in boards:
+        key, mirrored = board_key3(board)
+        expected = stored[key][::-1] if mirrored else stored[key]
+        assert table.get(board) == expected
+        assert table.get(board[:, ::-1]) == expected[::-1]
+
+def test_get_position_among_neighbour_keys(tmp_path):
+    rng = random.Random(1)
+    board = None
+    while board is None:
+        board = random_board(32, rng)
+    key, mirrored = board_key3(board)
+    assert key > 2 ** 53
+
+    # Keys a float64 comparison cannot tell apart
+    keys = [key - 2, key - 1, key, key + 1]
+    scores = np.arange(len(keys) * Position.WIDTH).reshape(len(keys), Position.WIDTH)
+    table_file = str(tmp_path / "neighbours.bin")
+    LookupTable.write(table_file, keys, scores)
+    expected = scores[2].tolist()
+    assert LookupTable(table_file).get(board) == (expected[::-1] if mirrored else expected)
+
+    LookupTable.write(table_file, [key - 1, key + 1], scores[:2])
+    assert LookupTable(table_file).get(board) is None
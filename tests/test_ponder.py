@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+from connect4_alg import Position
+from plays import Ponderer, SolverPool, result_cache
+from plays.plays import cached_board_scores
+import modules.board_param as param
+
+def board(moves):
+    # Board array after `moves` (1-based columns), the first player with param.PLAYER_PIECE
+    board_arr = np.zeros((param.ROW_COUNT, param.COLUMN_COUNT), dtype=np.int8)
+    piece = param.PLAYER_PIECE
+    for move in moves:
+        col = int(move) - 1
+        board_arr[np.count_nonzero(board_arr[:, col]), col] = piece
+        piece = -piece
+    return board_arr
+
+def test_stop_returns_within_a_time_slice():
+    pool = SolverPool(max_solvers=1, table_size=20)
+    ponderer = Ponderer(pool, time_slice=0.1)
+    ponderer.start(board("")) # the replies to the first move are far too slow to solve
+    time.sleep(0.3)
+    assert ponderer.is_running()
+    start = time.perf_counter()
+    ponderer.stop()
+    assert time.perf_counter() - start < 0.1 + 0.1
+    assert not ponderer.is_running()
+    assert ponderer.n_solved == 0
+    with pool.acquire():
+        pass # the pondering solver was handed back
+
+def test_replies_are_cached():
+    board_arr = board("44533232")
+    result_cache.clear() # replies cached by other tests would be skipped
+    ponderer = Ponderer(SolverPool(max_solvers=1, table_size=20), time_slice=0.1)
+    ponderer.start(board_arr)
+    deadline = time.monotonic() + 30
+    while ponderer.is_running() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    ponderer.stop()
+
+    position = Position(board_arr, param.PLAYER_PIECE)
+    replies = [col for col in range(param.COLUMN_COUNT) if position.can_play(col) and not position.is_winning_move(col)]
+    assert ponderer.n_solved == len(replies)
+    for col in replies:
+        reply = board_arr.copy()
+        reply[np.count_nonzero(reply[:, col]), col] = param.PLAYER_PIECE
+        assert cached_board_scores(reply) is not None
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+
+from connect4_alg import Solver
+from plays import PositionLog
+from plays._lookup_table import RECORD_DTYPE
+import modules.board_param as param
+
+def board(moves):
+    # Board array after `moves` (1-based columns), the first player with param.BOT_PIECE
+    board_arr = np.zeros((param.ROW_COUNT, param.COLUMN_COUNT), dtype=np.int8)
+    piece = param.BOT_PIECE
+    for move in moves:
+        col = int(move) - 1
+        board_arr[np.count_nonzero(board_arr[:, col]), col] = piece
+        piece = -piece
+    return board_arr
+
+SCORES = [Solver.INVALID_MOVE, -2, -1, 0, 1, 2, 3]
+
+def n_records(log_file):
+    return os.path.getsize(log_file) // RECORD_DTYPE.itemsize
+
+def test_append_and_reload(tmp_path):
+    log_file = str(tmp_path / "positions.records")
+    log = PositionLog(log_file)
+    assert not os.path.exists(log_file) # nothing is read or created before the first write
+    assert log.get(board("12")) is None
+    log.put(board("12"), SCORES)
+    assert log.get(board("12")) == SCORES
+
+    reloaded = PositionLog(log_file)
+    assert reloaded.get(board("12")) == SCORES
+    assert reloaded.get(board("76")) == SCORES[::-1]
+    assert len(reloaded) == 1
+
+def test_records_of_other_processes_are_read(tmp_path):
+    log_file = str(tmp_path / "positions.records")
+    log, other = PositionLog(log_file), PositionLog(log_file)
+    assert log.get(board("12")) is None
+    other.put(board("12"), SCORES)
+    assert log.get(board("12")) == SCORES
+
+def test_positions_are_logged_once(tmp_path):
+    log_file = str(tmp_path / "positions.records")
+    log, other = PositionLog(log_file), PositionLog(log_file)
+    log.put(board("12"), SCORES)
+    log.put(board("12"), SCORES)
+    log.put(board("76"), SCORES[::-1])
+    other.put(board("12"), SCORES) # already logged by another process
+    assert n_records(log_file) == 1
+    log.put(board("13"), SCORES)
+    assert n_records(log_file) == 2
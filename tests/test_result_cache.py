@@ -0,0 +1,42 @@
+import numpy as np
+
+from plays import ResultCache
+import modules.board_param as param
+
+def board(moves):
+    # Board array after `moves` (1-based columns), the first player with param.BOT_PIECE
+    board_arr = np.zeros((param.ROW_COUNT, param.COLUMN_COUNT), dtype=np.int8)
+    piece = param.BOT_PIECE
+    for move in moves:
+        col = int(move) - 1
+        board_arr[np.count_nonzero(board_arr[:, col]), col] = piece
+        piece = -piece
+    return board_arr
+
+SCORES = [-3, -2, -1, 0, 1, 2, 3]
+
+def test_mirror_shares_the_entry():
+    cache = ResultCache(10)
+    cache.put(board("12"), SCORES)
+    assert cache.get(board("12")) == SCORES
+    assert cache.get(board("76")) == SCORES[::-1]
+    assert cache.get(board("12"), weak=True) is None
+    assert cache.stats() == {"entries": 1, "max_entries": 10, "hits": 2, "misses": 1, "evictions": 0}
+
+def test_least_recently_used_is_evicted():
+    cache = ResultCache(2)
+    cache.put(board("12"), SCORES)
+    cache.put(board("13"), SCORES)
+    assert cache.get(board("76")) is not None # mirror of "12", now the most recently used
+    cache.put(board("14"), SCORES)
+    assert cache.evictions == 1
+    assert cache.get(board("13")) is None
+    assert cache.get(board("12")) is not None
+    assert cache.get(board("14")) is not None
+    assert len(cache) == 2
+
+def test_zero_entries_disables_the_cache():
+    cache = ResultCache(0)
+    cache.put(board("12"), SCORES)
+    assert cache.get(board("12")) is None
+    assert len(cache) == 0
@@ -0,0 +1,42 @@
+from connect4_alg import Position, Solver
+
+def position(moves):
+    position = Position()
+    position.play(moves)
+    return position
+
+def test_best_move_out_of_budget_does_not_lose_at_once():
+    # Every column but 2 lets the opponent win next move
+    P = position("52455711624")
+    solver = Solver(20)
+    for node_limit in (1, 2, 10, 100):
+        col = solver.best_move(P, False, 0, node_limit)
+        child = position("52455711624")
+        child.play_col(col)
+        assert not child.can_win_next()
+    assert solver.best_move(P) == 2
+
+def test_weak_analyze_bounded_keeps_ordered_bounds():
+    solver = Solver(20)
+    for moves in ("4157435232272166", "4116722171675647", "176272353154621575663755", "41362464657114", "4453323"):
+        for node_limit in (10, 50, 100, 1000, 0):
+            analysis = solver.analyze_bounded(position(moves), 0, node_limit, True)
+            assert all(lower <= upper for lower, upper in zip(analysis.lower, analysis.upper))
+            if analysis.complete:
+                assert analysis.lower == analysis.upper
+
+def test_threaded_analyze_bounded_matches_analyze():
+    solver = Solver(20)
+    scores = solver.analyze(position("4453323"))
+    for n_threads in (2, 4):
+        analysis = solver.analyze_bounded(position("4453323"), 0, 0, False, n_threads)
+        assert analysis.complete
+        assert analysis.lower == analysis.upper == scores
+        assert solver.best_move(position("4453323"), False, 0, 0, n_threads) == scores.index(max(scores))
+
+def test_threaded_analyze_bounded_shares_the_deadline():
+    solver = Solver(20)
+    analysis = solver.analyze_bounded(position("44"), 0.2, 0, False, 4)
+    assert not analysis.complete
+    assert solver.last_stats().elapsed < 1
+    assert all(lower <= upper for lower, upper in zip(analysis.lower, analysis.upper))